@@ -1,17 +1,31 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+import httpx
 import os
 import json
+import asyncio
 import re
+import io
+import hashlib
+import tempfile
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Check if API key is loaded
 if not os.getenv("OPENAI_API_KEY"):
     print("❌ Error: OPENAI_API_KEY not found in environment variables!")
@@ -25,350 +39,661 @@ token_usage = {
     'total_output_tokens': 0,
     'api_calls': 0,
     'analysis_calls': 0,
-    'segment_calls': 0
+    'segment_calls': 0,
+    'cached_calls': 0,
+    'cached_input_tokens': 0,
+    'cached_output_tokens': 0
 }
 
-def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float = 85.0) -> Dict[str, float]:
+# Maximum number of in-flight API requests (keeps us under RPM limits)
+MAX_CONCURRENT_REQUESTS = 8
+
+# Number of 5-minute conversation segments analyzed per API request
+SEGMENTS_PER_REQUEST = 12
+
+# On-disk cache of chat completions so re-running the same transcript costs nothing.
+# One file per request, so concurrent runs never write to a shared database
+LLM_CACHE_DIR = ".intent_cache"
+
+# Batch API requests are billed at half price; status is polled at this interval
+BATCH_PRICE_MULTIPLIER = 0.5
+BATCH_POLL_SECONDS = 30
+
+def create_client():
     """
-    Calculate the cost based on token usage for GPT-4o-mini
-    Args:
-        input_tokens: Number of input tokens
-        output_tokens: Number of output tokens
-        usd_to_inr_rate: USD to INR conversion rate
+    Create the async OpenAI client for one analysis run
     Returns:
-        dict: Cost breakdown in USD and INR
+        AsyncOpenAI: Client on a pooled HTTP/2 transport; use it with "async with" so the pool is closed
     """
-    # GPT-4o-mini pricing per 1M tokens
-    input_cost_per_1m = 0.15  # $0.15 per 1M input tokens
-    output_cost_per_1m = 0.60  # $0.60 per 1M output tokens
-    
-    input_cost_usd = (input_tokens / 1_000_000) * input_cost_per_1m
-    output_cost_usd = (output_tokens / 1_000_000) * output_cost_per_1m
-    total_cost_usd = input_cost_usd + output_cost_usd
-    
-    input_cost_inr = input_cost_usd * usd_to_inr_rate
-    output_cost_inr = output_cost_usd * usd_to_inr_rate
-    total_cost_inr = total_cost_usd * usd_to_inr_rate
-    
-    return {
-        "usd_to_inr_rate": usd_to_inr_rate,
-        "input_tokens": input_tokens,
-        "output_tokens": output_tokens,
-        "total_tokens": input_tokens + output_tokens,
-        "input_cost_usd": round(input_cost_usd, 6),
-        "output_cost_usd": round(output_cost_usd, 6),
-        "input_cost_inr": round(input_cost_inr, 4),
-        "output_cost_inr": round(output_cost_inr, 4),
-        "total_cost_usd": round(total_cost_usd, 6),
-        "total_cost_inr": round(total_cost_inr, 4)
-    }
+    # Pooled HTTP/2 transport shared by every API call in the run, so concurrent requests
+    # multiplex over kept-alive connections instead of re-doing TCP/TLS handshakes.
+    # Pooled connections belong to the event loop that opened them, so each run gets its own
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=60.0
+    )
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
 
-def count_tokens(text: str) -> int:
-    """Simple token counter (approximate for gpt-4o-mini)"""
-    tokens = re.findall(r'\b\w+\b|[^\w\s]', text)
-    return len(tokens)
+def json_loads(data):
+    """Parse JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def write_json(path, data):
+    """
+    Write data as indented UTF-8 JSON, using orjson when it is installed
+    Note: the orjson output is equivalent JSON but not byte-identical to json.dump
+    (e.g. small floats are written as 2e-6 instead of 2e-06)
+    """
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+# GPT-4o-mini pricing per token ($0.15 / $0.60 per 1M input / output tokens)
+_IN_RATE = 0.15 / 1_000_000
+_OUT_RATE = 0.60 / 1_000_000
 
-def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float = 85.0) -> dict:
+def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float = 85.0,
+                   price_multiplier: float = 1.0) -> Dict[str, float]:
     """
     Calculate the cost based on token usage for GPT-4o-mini
     Args:
         input_tokens: Number of input tokens
         output_tokens: Number of output tokens
         usd_to_inr_rate: USD to INR conversion rate
+        price_multiplier: Discount applied to list prices (e.g. 0.5 for the Batch API)
     Returns:
         dict: Cost breakdown in USD and INR
     """
-    # GPT-4o-mini pricing per 1M tokens
-    input_cost_per_1m = 0.15  # $0.15 per 1M input tokens
-    output_cost_per_1m = 0.60  # $0.60 per 1M output tokens
-    
-    input_cost_usd = (input_tokens / 1_000_000) * input_cost_per_1m
-    output_cost_usd = (output_tokens / 1_000_000) * output_cost_per_1m
+    input_cost_usd = input_tokens * _IN_RATE * price_multiplier
+    output_cost_usd = output_tokens * _OUT_RATE * price_multiplier
     total_cost_usd = input_cost_usd + output_cost_usd
     
-    input_cost_inr = input_cost_usd * usd_to_inr_rate
-    output_cost_inr = output_cost_usd * usd_to_inr_rate
-    total_cost_inr = total_cost_usd * usd_to_inr_rate
-    
     return {
         "usd_to_inr_rate": usd_to_inr_rate,
+        "price_multiplier": price_multiplier,
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
         "total_tokens": input_tokens + output_tokens,
         "input_cost_usd": round(input_cost_usd, 6),
         "output_cost_usd": round(output_cost_usd, 6),
-        "input_cost_inr": round(input_cost_inr, 4),
-        "output_cost_inr": round(output_cost_inr, 4),
+        "input_cost_inr": round(input_cost_usd * usd_to_inr_rate, 4),
+        "output_cost_inr": round(output_cost_usd * usd_to_inr_rate, 4),
         "total_cost_usd": round(total_cost_usd, 6),
-        "total_cost_inr": round(total_cost_inr, 4)
+        "total_cost_inr": round(total_cost_usd * usd_to_inr_rate, 4)
     }
 
-def parse_line(line):
-    """Parse a line to extract role and timestamp."""
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the gpt-4o-mini BPE encoding once (None if tiktoken is unavailable)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
     try:
-        line = line.strip()
-        if not line or line.startswith('#'):  # Skip empty lines and error markers
-            return None, None
-            
-        # Find the role (first bracket pair)
-        role_start = line.find('[') + 1
-        role_end = line.find(']')
-        if role_start == 0 or role_end == -1:
-            return None, None
-        role = line[role_start:role_end]
-
-        # Find the timestamp (second bracket pair)
-        time_start = line.find('[', role_end) + 1
-        time_end = line.find(']', time_start)
-        if time_start == 0 or time_end == -1:
-            return None, None
-        
-        time_str = line[time_start:time_end]
-        timestamp = datetime.strptime(time_str, "%H:%M:%S")
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:  # Unknown model in an old tiktoken, or encoding data not downloadable
+        return None
 
-        return role, timestamp
-    except Exception as e:
-        # Debug: uncomment the line below to see parsing errors
-        # print(f"Parse error: {e} for line: {line[:50]}...")
-        return None, None
+def count_tokens(text: str) -> int:
+    """Count tokens exactly as billed for gpt-4o-mini (regex approximation without tiktoken)"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(re.findall(r'\b\w+\b|[^\w\s]', text))
 
-def calculate_talk_times(file_path):
-    """Calculate talk times for each speaker in the conversation."""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
+# Speaker-segmented transcript line: [Role][HH:MM:SS] text
+_LINE_RE = re.compile(r'^\[([^\]]+)\]\[(\d{1,2}:\d{2}:\d{2})\]\s*(.*)$')
 
-    talk_times = {'Customer': timedelta(), 'Sales Agent': timedelta()}
-    parsed = []
+def parse_line(line):
+    """Parse a line into role, timestamp (seconds from call start), raw timestamp and text."""
+    match = _LINE_RE.match(line.strip())
+    if not match:  # Skips empty lines, comments and malformed lines
+        return None, None, None, None
+    
+    role, time_str, text = match.groups()
+    
+    # Fixed HH:MM:SS format, so plain integer arithmetic beats strptime
+    hours, minutes, seconds = time_str.split(':')
+    return role, int(hours) * 3600 + int(minutes) * 60 + int(seconds), time_str, text
 
-    for line in lines:
-        role, timestamp = parse_line(line)
-        if role and timestamp:
-            parsed.append((role, timestamp))
+def parse_transcript(file_path):
+    """
+    Parse the speaker-segmented transcript in a single pass
+    Returns:
+        tuple: (talk times per speaker as timedelta, list of customer lines)
+    """
+    talk_seconds = {'Customer': 0, 'Sales Agent': 0}
+    customer_lines = []
+    previous = None
 
-    for i in range(len(parsed) - 1):
-        current_role, current_time = parsed[i]
-        next_role, next_time = parsed[i + 1]
-        duration = next_time - current_time
-        talk_times[current_role] += duration
+    # Iterate the file object directly so lines stream from the read buffer
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            role, timestamp, time_str, text = parse_line(line)
+            if not role:
+                continue
+            
+            # Each line lasts until the next line starts
+            if previous:
+                talk_seconds[previous[0]] += timestamp - previous[1]
+            previous = (role, timestamp)
+            
+            if role == 'Customer' and text:
+                customer_lines.append({
+                    'timestamp': time_str,
+                    'text': text
+                })
 
     # Handle the last line (assume default 1 second duration)
-    if parsed:
-        talk_times[parsed[-1][0]] += timedelta(seconds=1)
+    if previous:
+        talk_seconds[previous[0]] += 1
 
-    return talk_times
+    # Convert to timedelta only at the end, for display and reporting
+    talk_times = {role: timedelta(seconds=seconds) for role, seconds in talk_seconds.items()}
+    return talk_times, customer_lines
 
-def extract_customer_lines(file_path):
-    """Extract only customer lines from the speaker-segmented transcript."""
-    customer_lines = []
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    for line in lines:
-        line = line.strip()
-        if line.startswith('[Customer]['):
-            # Extract timestamp and text
-            try:
-                # Find the second bracket pair for timestamp
-                first_bracket_end = line.find(']')
-                timestamp_start = line.find('[', first_bracket_end) + 1
-                timestamp_end = line.find(']', timestamp_start)
-                timestamp = line[timestamp_start:timestamp_end]
-                
-                # Extract the spoken text
-                text_start = line.find('] ', timestamp_end) + 2
-                text = line[text_start:]
-                
-                customer_lines.append({
-                    'timestamp': timestamp,
-                    'text': text
-                })
-            except:
-                continue
+def cache_path(request):
+    """Path of the on-disk cache entry for a chat completion request."""
+    key = hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(LLM_CACHE_DIR, f"{key}.json")
+
+def read_cache(request):
+    """
+    Look up a cached chat completion
+    Returns:
+        tuple: (response content, usage dict), or None if the request is not cached
+    """
+    path = cache_path(request)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+    return entry['content'], entry['usage']
+
+def write_cache(request, content, usage, finish_reason):
+    """Cache a chat completion if it is complete and parseable, so a truncated one is retried next run."""
+    try:
+        json_loads(content)
+    except (ValueError, TypeError):
+        return
+    if finish_reason != "stop":
+        return
     
-    return customer_lines
+    # Write to a temp file of our own and move it into place, so concurrent runs
+    # never read a half-written entry or write over each other's temp file
+    os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=LLM_CACHE_DIR)
+    with open(fd, 'w', encoding='utf-8') as f:
+        json.dump({'content': content, 'usage': usage}, f)
+    os.replace(tmp_path, cache_path(request))
 
-def analyze_customer_intent_and_sentiment(customer_lines):
-    """Analyze customer intent and sentiment using OpenAI."""
-    global token_usage
+async def cached_chat(client, messages, model="gpt-4o-mini", temperature=0.2, **kwargs):
+    """
+    Get a chat completion, serving identical repeat requests from the on-disk cache
+    Args:
+        client: AsyncOpenAI client of the current run
+        messages: Chat messages to send
+        model: Model name
+        temperature: Sampling temperature
+        **kwargs: Extra parameters passed to the completions API (part of the cache key)
+    Returns:
+        tuple: (response content, usage dict, whether it was served from cache)
+    """
+    request = {"model": model, "messages": messages, "temperature": temperature, **kwargs}
     
-    # Combine all customer statements
-    combined_text = "\n".join([f"[{line['timestamp']}] {line['text']}" for line in customer_lines])
+    cached = read_cache(request)
+    if cached:
+        return cached[0], cached[1], True
+    
+    response = await client.chat.completions.create(**request)
+    
+    # Keep the original usage alongside the content so cached runs can report the tokens they saved
+    usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+    if hasattr(response, 'usage') and response.usage:
+        usage = {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens
+        }
+    content = response.choices[0].message.content
     
-    system_message = "You are an expert sales analyst specializing in customer intent and sentiment analysis for travel bookings. Provide detailed, accurate analysis based on customer behavior patterns."
+    write_cache(request, content, usage, response.choices[0].finish_reason)
     
-    prompt = f"""
-Analyze the following customer statements from a sales call transcript. The customer is discussing a travel package to Bali.
+    return content, usage, False
+
+# Static prompt content lives entirely in the system messages so every request shares
+# a byte-identical prefix and benefits from OpenAI's automatic prompt caching
+OVERALL_SYSTEM_MESSAGE = """You are an expert sales analyst specializing in customer intent and sentiment analysis for travel bookings. Provide detailed, accurate analysis based on customer behavior patterns.
+
+Analyze the customer statements from a sales call transcript provided by the user. The customer is discussing a travel package to Bali.
 
 Please provide a comprehensive analysis in JSON format with the following structure:
 
-{{
+{
     "overall_intent": "string describing the main customer intent",
     "purchase_likelihood": "High/Medium/Low",
-    "sentiment_analysis": {{
+    "sentiment_analysis": {
         "overall_sentiment": "Positive/Negative/Neutral",
         "confidence_score": "percentage (0-100)",
         "sentiment_indicators": ["list of words/phrases that indicate sentiment"]
-    }},
+    },
     "key_interests": ["list of things the customer is most interested in"],
     "concerns_objections": ["list of customer concerns or objections"],
     "buying_signals": ["list of positive buying signals detected"],
     "decision_stage": "Awareness/Consideration/Decision/Post-Decision",
     "commitment_level": "High/Medium/Low",
     "detailed_analysis": "paragraph explaining the analysis"
-}}
+}
 
 Important sentiment indicators:
 - POSITIVE signals: words like "visa", "passport", "appointment", "booking", "confirm", "let's do it", "sounds good", "I like", "perfect", "great"
 - ENGAGEMENT signals: asking detailed questions, discussing specific dates, comparing options
 - NEGATIVE signals: "expensive", "too much", "not sure", "maybe", "I need to think", "budget constraints"
+"""
+
+SEGMENT_SYSTEM_MESSAGE = """You are a conversation analyst. Respond only with valid JSON.
+
+Analyze each of the conversation segments provided by the user for customer sentiment and engagement level.
+Respond with ONLY a JSON object containing one entry per segment, in the same order:
 
-Customer Statements:
-{combined_text}
+{
+    "segments": [
+        {
+            "id": "segment number as given in the heading",
+            "s": "sentiment: P (Positive) / U (Neutral) / N (Negative)",
+            "e": "engagement: H (High) / M (Medium) / L (Low)",
+            "k": ["main points discussed, a few words each"],
+            "b": "buying signals: Y (Yes) / N (No)"
+        }
+    ]
+}
 """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
-        )
+# Single-letter codes used in the segment schema to keep responses short
+_SENTIMENT_CODES = {'P': 'Positive', 'U': 'Neutral', 'N': 'Negative'}
+_ENGAGEMENT_CODES = {'H': 'High', 'M': 'Medium', 'L': 'Low'}
+_YES_NO_CODES = {'Y': 'Yes', 'N': 'No'}
+
+# Keyword rubric from the overall prompt, reused to skip segments with nothing to analyze
+_POSITIVE_KEYWORDS = ("visa", "passport", "appointment", "booking", "confirm", "let's do it", "sounds good", "i like", "perfect", "great")
+_NEGATIVE_KEYWORDS = ("expensive", "too much", "not sure", "maybe", "i need to think", "budget constraints")
+_ENGAGEMENT_KEYWORDS = ("date", "dates", "option", "options", "compare", "comparing")  # specific dates, comparing options
+_SIGNAL_KEYWORDS = _POSITIVE_KEYWORDS + _NEGATIVE_KEYWORDS + _ENGAGEMENT_KEYWORDS
+# Whole words only, so e.g. "date" doesn't match "update"
+_SIGNAL_PATTERN = re.compile(r"\b(?:" + "|".join(map(re.escape, _SIGNAL_KEYWORDS)) + r")\b")
+TRIVIAL_SEGMENT_CHARS = 40
+
+# Output caps: decode time grows linearly with output tokens
+OVERALL_MAX_TOKENS = 600
+SEGMENT_MAX_TOKENS = 120  # per segment in a batch
+
+def reset_token_usage():
+    """Zero the global token counters at the start of an analysis run."""
+    for key in token_usage:
+        token_usage[key] = 0
+
+def record_usage(call_type, label, usage, cached=False):
+    """Add the token usage of one completion to the global counters and log it."""
+    input_tokens = usage['prompt_tokens']
+    output_tokens = usage['completion_tokens']
+    token_usage[call_type] += 1
+    
+    # Cache hits were never sent, so they count separately from the billed calls and tokens
+    if cached:
+        token_usage['cached_calls'] += 1
+        token_usage['cached_input_tokens'] += input_tokens
+        token_usage['cached_output_tokens'] += output_tokens
+    else:
+        token_usage['api_calls'] += 1
+        token_usage['total_input_tokens'] += input_tokens
+        token_usage['total_output_tokens'] += output_tokens
+    print(f"  {label} - Input: {input_tokens:,}, Output: {output_tokens:,}{' (cached)' if cached else ''}")
+
+def build_overall_request(customer_lines):
+    """Build the chat completion request for the overall intent and sentiment analysis."""
+    # Combine all customer statements
+    combined_text = "\n".join([f"[{line['timestamp']}] {line['text']}" for line in customer_lines])
+    
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": OVERALL_SYSTEM_MESSAGE},
+            {"role": "user", "content": f"Customer Statements:\n{combined_text}"}
+        ],
+        "temperature": 0.2,
+        "max_tokens": OVERALL_MAX_TOKENS,
+        "response_format": {"type": "json_object"}
+    }
+
+def build_segment_request(batch):
+    """Build the chat completion request for a batch of conversation segments."""
+    segments_text = "\n\n".join([
+        f"### Segment {index+1} ({index*5}-{(index+1)*5}m):\n" + " ".join([line['text'] for line in segment])
+        for index, segment in batch
+    ])
+    
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": SEGMENT_SYSTEM_MESSAGE},
+            {"role": "user", "content": f"Customer statements by segment:\n{segments_text}"}
+        ],
+        "temperature": 0.1,
+        "max_tokens": SEGMENT_MAX_TOKENS * len(batch),
+        "response_format": {"type": "json_object"}
+    }
+
+def segment_batch_label(batch):
+    """Human-readable label for a batch of segments."""
+    if len(batch) > 1:
+        return f"Segments {batch[0][0]+1}-{batch[-1][0]+1}"
+    return f"Segment {batch[0][0]+1}"
+
+def parse_segment_batch(batch, content):
+    """Map a batched segment response back to per-segment analysis entries."""
+    results = json_loads(content)['segments']
+    
+    # Read each id on its own, taking just the digits ("Segment 3" -> 3), so one odd id
+    # doesn't throw away the whole batch; items without a usable id are skipped
+    analyses = {}
+    for item in results:
+        match = re.search(r"\d+", str(item.get('id', ''))) if isinstance(item, dict) else None
+        if match:
+            analyses[int(match.group())] = item
+    
+    # When the ids don't line up but there is one entry per segment, fall back to response order
+    if len(results) == len(batch) and any(index + 1 not in analyses for index, _ in batch):
+        analyses = {index + 1: item for (index, _), item in zip(batch, results)}
+    
+    segment_analysis = []
+    for index, _ in batch:
+        item = analyses.get(index + 1)
+        try:
+            # Expand the single-letter codes back to the full labels used downstream
+            analysis = {
+                "sentiment": _SENTIMENT_CODES[item['s']],
+                "engagement": _ENGAGEMENT_CODES[item['e']],
+                "key_points": item.get('k', []),
+                "buying_signals": _YES_NO_CODES[item['b']]
+            }
+        except (KeyError, TypeError):
+            print(f"Warning: no valid analysis returned for segment {index+1}")
+            continue
         
-        # Track actual token usage from API response
-        if hasattr(response, 'usage') and response.usage:
-            input_tokens = response.usage.prompt_tokens
-            output_tokens = response.usage.completion_tokens
-            token_usage['total_input_tokens'] += input_tokens
-            token_usage['total_output_tokens'] += output_tokens
-            token_usage['analysis_calls'] += 1
-            print(f"  🔍 Overall Analysis - Input: {input_tokens:,}, Output: {output_tokens:,}")
+        segment_analysis.append(segment_entry(index, analysis))
+    
+    return segment_analysis
+
+def segment_entry(index, analysis):
+    """Wrap one segment's analysis with its number and time range."""
+    return {
+        "segment": index + 1,
+        "time_range": f"{index*5}-{(index+1)*5} minutes",
+        "analysis": analysis
+    }
+
+def is_trivial_segment(segment):
+    """Check whether a segment is too short or signal-free to be worth an API call."""
+    segment_text = " ".join([line['text'] for line in segment]).lower()
+    return len(segment_text) < TRIVIAL_SEGMENT_CHARS or not _SIGNAL_PATTERN.search(segment_text)
+
+def group_segments(customer_lines):
+    """
+    Group customer lines into 5-minute segments and pack them into request batches
+    Returns:
+        tuple: (request batches, default analyses for trivial segments)
+    """
+    # Split into conversation segments (every 5 minutes), keyed by segment number
+    segments = defaultdict(list)
+    
+    for line in customer_lines:
+        # Include the hours so calls past the hour mark don't wrap back to segment 0
+        hours, minutes, _ = line['timestamp'].split(':')
+        segments[(int(hours) * 60 + int(minutes)) // 5].append(line)
+    
+    # Trivial segments get a default Neutral/Low/No analysis without an API call
+    non_empty = []
+    skipped = []
+    for i in sorted(segments):
+        segment = segments[i]
+        if is_trivial_segment(segment):
+            skipped.append(segment_entry(i, {
+                "sentiment": "Neutral",
+                "engagement": "Low",
+                "key_points": [],
+                "buying_signals": "No"
+            }))
+        else:
+            non_empty.append((i, segment))
+    
+    if skipped:
+        print(f"  ⏭️  Skipped {len(skipped)} trivial segment(s) without an API call")
+    
+    # Pack the remaining segments into batches of (segment index, lines)
+    batches = [non_empty[i:i + SEGMENTS_PER_REQUEST] for i in range(0, len(non_empty), SEGMENTS_PER_REQUEST)]
+    return batches, skipped
+
+async def analyze_customer_intent_and_sentiment(client, customer_lines, semaphore):
+    """Analyze customer intent and sentiment using OpenAI."""
+    try:
+        async with semaphore:
+            content, usage, cached = await cached_chat(client, **build_overall_request(customer_lines))
         
-        token_usage['api_calls'] += 1
+        # Cached responses carry the usage of the original call, reported apart from billed tokens
+        record_usage('analysis_calls', "🔍 Overall Analysis", usage, cached)
         
-        return response.choices[0].message.content
+        return content
     
     except Exception as e:
         print(f"Error analyzing customer intent: {e}")
         return None
 
-def analyze_conversation_flow(customer_lines):
+async def analyze_segment_batch(client, batch, semaphore):
+    """Analyze sentiment and engagement for a batch of conversation segments in one request."""
+    label = segment_batch_label(batch)
+    
+    try:
+        async with semaphore:
+            content, usage, cached = await cached_chat(client, **build_segment_request(batch))
+        
+        # Cached responses carry the usage of the original call, reported apart from billed tokens
+        record_usage('segment_calls', f"📊 {label}", usage, cached)
+        
+        return parse_segment_batch(batch, content)
+    
+    except Exception as e:
+        print(f"Error analyzing {label}: {e}")
+        return []
+
+async def analyze_conversation_flow(client, customer_lines, semaphore):
     """Analyze how customer sentiment evolves throughout the conversation."""
-    global token_usage
+    batches, skipped = group_segments(customer_lines)
     
-    # Split into conversation segments (every 5 minutes)
-    segments = []
-    current_segment = []
+    # Run the segment batches concurrently, then merge in the skipped segments by number
+    results = await asyncio.gather(*[
+        analyze_segment_batch(client, batch, semaphore) for batch in batches
+    ])
     
-    for line in customer_lines:
-        timestamp = line['timestamp']
-        # Convert timestamp to minutes
-        time_parts = timestamp.split(':')
-        minutes = int(time_parts[1])
-        
-        # Group by 5-minute segments
-        segment_number = minutes // 5
+    analyzed = [segment for batch_result in results for segment in batch_result]
+    return sorted(analyzed + skipped, key=lambda seg: seg['segment'])
+
+async def run_analyses(customer_lines):
+    """Run the overall analysis and all segment analyses concurrently."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with create_client() as client:
+        return await asyncio.gather(
+            analyze_customer_intent_and_sentiment(client, customer_lines, semaphore),
+            analyze_conversation_flow(client, customer_lines, semaphore)
+        )
+
+async def submit_batch(requests):
+    """
+    Run chat completion requests as one OpenAI Batch API job and wait for it to finish
+    Args:
+        requests: Request bodies keyed by custom_id
+    Returns:
+        str: Output JSONL of the job, or None if it could not be run
+    """
+    # One JSONL line per request, matched back to its result through custom_id
+    batch_input = "\n".join([
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in requests.items()
+    ])
+    
+    try:
+        async with create_client() as client:
+            input_file = await client.files.create(
+                file=("analysis_batch.jsonl", batch_input.encode('utf-8')),
+                purpose="batch"
+            )
+            job = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            print(f"  📦 Submitted batch {job.id} with {len(requests)} requests")
+            
+            while job.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                await asyncio.sleep(BATCH_POLL_SECONDS)
+                job = await client.batches.retrieve(job.id)
+                print(f"  ⏳ Batch status: {job.status}")
+            
+            if job.status != 'completed' or not job.output_file_id:
+                print(f"Error: batch {job.id} finished with status '{job.status}'")
+                return None
+            
+            output = await client.files.content(job.output_file_id)
+            return output.text
+    except Exception as e:
+        print(f"Error running batch analysis: {e}")
+        return None
+
+def parse_batch_output(output, requests):
+    """
+    Read the successful results out of a batch output file and cache them
+    Args:
+        output: Output JSONL of the batch job
+        requests: Submitted request bodies keyed by custom_id
+    Returns:
+        dict: (response content, usage dict, False) keyed by custom_id
+    """
+    results = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
         
-        if not segments or len(segments) <= segment_number:
-            segments.extend([[] for _ in range(segment_number + 1 - len(segments))])
+        # A malformed or failed line only loses its own request, like a failed call outside batch mode
+        try:
+            result = json_loads(line)
+            custom_id = result['custom_id']
+            response = result.get('response') or {}
+            if response.get('status_code') != 200:
+                print(f"Error in batch request {custom_id}: {result.get('error') or response.get('status_code')}")
+                continue
+            body = response['body']
+            choice = body['choices'][0]
+            content = choice['message']['content']
+            usage = {
+                'prompt_tokens': body['usage']['prompt_tokens'],
+                'completion_tokens': body['usage']['completion_tokens']
+            }
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            print(f"Warning: skipping unreadable batch output line: {e}")
+            continue
         
-        segments[segment_number].append(line)
+        if custom_id not in requests:
+            continue
+        write_cache(requests[custom_id], content, usage, choice.get('finish_reason'))
+        results[custom_id] = (content, usage, False)
     
-    # Analyze each segment
-    segment_analysis = []
-    for i, segment in enumerate(segments):
-        if not segment:
+    return results
+
+async def run_batch_analyses(customer_lines):
+    """Run all analyses through the OpenAI Batch API (50% cheaper, results within 24h)."""
+    batches, skipped = group_segments(customer_lines)
+    requests = {"overall": build_overall_request(customer_lines)}
+    for n, batch in enumerate(batches):
+        requests[f"segments-{n}"] = build_segment_request(batch)
+    
+    # Serve repeat requests from the same on-disk cache as the non-batch path and submit only the rest
+    results = {}
+    for custom_id, body in requests.items():
+        cached = read_cache(body)
+        if cached:
+            results[custom_id] = (cached[0], cached[1], True)
+    
+    pending = {custom_id: body for custom_id, body in requests.items() if custom_id not in results}
+    if pending:
+        output = await submit_batch(pending)
+        if output is not None:
+            results.update(parse_batch_output(output, pending))
+    
+    overall_analysis = None
+    if 'overall' in results:
+        content, usage, cached = results['overall']
+        record_usage('analysis_calls', "🔍 Overall Analysis", usage, cached)
+        overall_analysis = content
+    else:
+        print("Error analyzing customer intent: no result in batch output")
+    
+    segment_analysis = skipped
+    for n, batch in enumerate(batches):
+        label = segment_batch_label(batch)
+        if f"segments-{n}" not in results:
+            print(f"Error analyzing {label}: no result in batch output")
             continue
-            
-        segment_text = " ".join([line['text'] for line in segment])
-        
-        system_message = "You are a conversation analyst. Respond only with valid JSON."
-        prompt = f"""
-Analyze this conversation segment for customer sentiment and engagement level.
-Respond with ONLY a JSON object:
-
-{{
-    "sentiment": "Positive/Negative/Neutral",
-    "engagement": "High/Medium/Low",
-    "key_points": ["main points discussed"],
-    "buying_signals": "Yes/No"
-}}
-
-Customer statements in this segment:
-{segment_text}
-"""
         
+        content, usage, cached = results[f"segments-{n}"]
+        record_usage('segment_calls', f"📊 {label}", usage, cached)
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
-            )
-            
-            # Track actual token usage from API response
-            if hasattr(response, 'usage') and response.usage:
-                input_tokens = response.usage.prompt_tokens
-                output_tokens = response.usage.completion_tokens
-                token_usage['total_input_tokens'] += input_tokens
-                token_usage['total_output_tokens'] += output_tokens
-                token_usage['segment_calls'] += 1
-                print(f"  📊 Segment {i+1} - Input: {input_tokens:,}, Output: {output_tokens:,}")
-            
-            token_usage['api_calls'] += 1
-            
-            segment_analysis.append({
-                "segment": i + 1,
-                "time_range": f"{i*5}-{(i+1)*5} minutes",
-                "analysis": response.choices[0].message.content
-            })
-            
+            segment_analysis.extend(parse_segment_batch(batch, content))
         except Exception as e:
-            print(f"Error analyzing segment {i+1}: {e}")
-            continue
+            print(f"Error analyzing {label}: {e}")
     
-    return segment_analysis
+    segment_analysis.sort(key=lambda seg: seg['segment'])
+    return overall_analysis, segment_analysis
+
+def _fmt_dur(td, width=0):
+    """Format a timedelta as 'Xm Ys', right-aligning each field to width."""
+    minutes, seconds = divmod(int(td.total_seconds()), 60)
+    return f"{minutes:{width}d}m {seconds:{width}d}s"
 
-def clean_and_structure_data(overall_analysis, segment_analysis, total_statements, talk_times):
+def _pct(part, total):
+    """Percentage of part in total, rounded to one decimal (0.0 when total is zero)."""
+    return round(part / total * 100, 1) if total else 0.0
+
+def clean_and_structure_data(overall_analysis, segment_analysis, total_statements, talk_times, batch=False):
     """Clean and restructure the analysis data for better readability."""
     global token_usage
     
-    # Clean the overall analysis
-    if overall_analysis.startswith('```json\n'):
-        json_start = overall_analysis.find('{')
-        json_end = overall_analysis.rfind('}') + 1
-        clean_json_str = overall_analysis[json_start:json_end]
-        overall_analysis_clean = json.loads(clean_json_str)
-    else:
-        overall_analysis_clean = json.loads(overall_analysis)
+    # JSON mode guarantees a bare JSON object, so no code-fence stripping is needed
+    overall_analysis_clean = json_loads(overall_analysis)
     
-    # Clean the conversation flow analysis
-    conversation_flow = []
-    for segment in segment_analysis:
-        try:
-            analysis_data = json.loads(segment['analysis'])
-            clean_segment = {
-                "segment": segment['segment'],
-                "time_range": segment['time_range'],
-                "analysis": analysis_data
-            }
-            conversation_flow.append(clean_segment)
-        except json.JSONDecodeError:
-            continue
+    # Conversation flow analysis is parsed and validated per batch already
+    conversation_flow = segment_analysis
+    
+    # Tally all summary metrics in a single pass over the segments
+    counts = Counter()
+    for seg in conversation_flow:
+        analysis = seg['analysis']
+        counts['buying_signals'] += analysis['buying_signals'] == 'Yes'
+        counts['sentiment_' + analysis['sentiment']] += 1
+        counts['engagement_' + analysis['engagement']] += 1
     
     # Calculate actual call duration from talk times
     total_duration = sum(talk_times.values(), timedelta())
-    actual_minutes = int(total_duration.total_seconds() // 60)
-    actual_seconds = int(total_duration.total_seconds() % 60)
+    total_seconds = total_duration.total_seconds()
+    customer_seconds = talk_times['Customer'].total_seconds()
+    agent_seconds = talk_times['Sales Agent'].total_seconds()
     
     # Calculate cost breakdown
     cost_breakdown = calculate_cost(
         token_usage['total_input_tokens'], 
-        token_usage['total_output_tokens']
+        token_usage['total_output_tokens'],
+        price_multiplier=BATCH_PRICE_MULTIPLIER if batch else 1.0
     )
     
     # Create the clean structure
@@ -376,26 +701,28 @@ def clean_and_structure_data(overall_analysis, segment_analysis, total_statement
         "call_metadata": {
             "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "total_customer_statements": total_statements,
-            "actual_call_duration": f"{actual_minutes}m {actual_seconds}s",
+            "actual_call_duration": _fmt_dur(total_duration),
             "talk_time_breakdown": {
-                "customer_time": f"{int(talk_times['Customer'].total_seconds() // 60)}m {int(talk_times['Customer'].total_seconds() % 60)}s",
-                "agent_time": f"{int(talk_times['Sales Agent'].total_seconds() // 60)}m {int(talk_times['Sales Agent'].total_seconds() % 60)}s",
-                "customer_percentage": round((talk_times['Customer'].total_seconds() / total_duration.total_seconds()) * 100, 1) if total_duration.total_seconds() > 0 else 0,
-                "agent_percentage": round((talk_times['Sales Agent'].total_seconds() / total_duration.total_seconds()) * 100, 1) if total_duration.total_seconds() > 0 else 0
+                "customer_time": _fmt_dur(talk_times['Customer']),
+                "agent_time": _fmt_dur(talk_times['Sales Agent']),
+                "customer_percentage": _pct(customer_seconds, total_seconds),
+                "agent_percentage": _pct(agent_seconds, total_seconds)
             }
         },
         "overall_analysis": overall_analysis_clean,
         "conversation_flow": conversation_flow,
         "summary_metrics": {
-            "segments_with_buying_signals": sum(1 for seg in conversation_flow if seg['analysis']['buying_signals'] == 'Yes'),
+            "segments_with_buying_signals": counts['buying_signals'],
             "total_segments": len(conversation_flow),
-            "positive_segments": sum(1 for seg in conversation_flow if seg['analysis']['sentiment'] == 'Positive'),
-            "neutral_segments": sum(1 for seg in conversation_flow if seg['analysis']['sentiment'] == 'Neutral'),
-            "negative_segments": sum(1 for seg in conversation_flow if seg['analysis']['sentiment'] == 'Negative'),
-            "high_engagement_segments": sum(1 for seg in conversation_flow if seg['analysis']['engagement'] == 'High')
+            "positive_segments": counts['sentiment_Positive'],
+            "neutral_segments": counts['sentiment_Neutral'],
+            "negative_segments": counts['sentiment_Negative'],
+            "high_engagement_segments": counts['engagement_High']
         },
         "token_usage": {
             "api_calls_made": token_usage['api_calls'],
+            "cached_calls": token_usage['cached_calls'],
+            "cached_tokens": token_usage['cached_input_tokens'] + token_usage['cached_output_tokens'],
             "total_input_tokens": token_usage['total_input_tokens'],
             "total_output_tokens": token_usage['total_output_tokens'],
             "total_tokens": token_usage['total_input_tokens'] + token_usage['total_output_tokens']
@@ -408,98 +735,104 @@ def clean_and_structure_data(overall_analysis, segment_analysis, total_statement
 def create_formatted_report(clean_data, output_file):
     """Create a beautifully formatted text report."""
     
-    report = []
+    # Stream lines into one in-memory buffer instead of accumulating a list
+    report = io.StringIO()
+    
+    def w(line=""):
+        report.write(line)
+        report.write("\n")
     
     # Header
-    report.append("🎯 CUSTOMER INTENT & SENTIMENT ANALYSIS")
-    report.append("=" * 80)
-    report.append(f"📅 Analysis Date: {clean_data['call_metadata']['analysis_date']}")
-    report.append(f"📞 Total Customer Statements: {clean_data['call_metadata']['total_customer_statements']}")
-    report.append(f"⏱️  Actual Call Duration: {clean_data['call_metadata']['actual_call_duration']}")
-    report.append("")
+    w("🎯 CUSTOMER INTENT & SENTIMENT ANALYSIS")
+    w("=" * 80)
+    w(f"📅 Analysis Date: {clean_data['call_metadata']['analysis_date']}")
+    w(f"📞 Total Customer Statements: {clean_data['call_metadata']['total_customer_statements']}")
+    w(f"⏱️  Actual Call Duration: {clean_data['call_metadata']['actual_call_duration']}")
+    w()
     
     # Talk Time Breakdown
     talk_breakdown = clean_data['call_metadata']['talk_time_breakdown']
-    report.append("🎙️  TALK TIME BREAKDOWN")
-    report.append("-" * 40)
-    report.append(f"👤 Customer:    {talk_breakdown['customer_time']} ({talk_breakdown['customer_percentage']}%)")
-    report.append(f"🏢 Sales Agent: {talk_breakdown['agent_time']} ({talk_breakdown['agent_percentage']}%)")
-    report.append("")
+    w("🎙️  TALK TIME BREAKDOWN")
+    w("-" * 40)
+    w(f"👤 Customer:    {talk_breakdown['customer_time']} ({talk_breakdown['customer_percentage']}%)")
+    w(f"🏢 Sales Agent: {talk_breakdown['agent_time']} ({talk_breakdown['agent_percentage']}%)")
+    w()
     
     # Executive Summary
     overall = clean_data['overall_analysis']
     sentiment = overall['sentiment_analysis']
     
-    report.append("📊 EXECUTIVE SUMMARY")
-    report.append("-" * 40)
-    report.append(f"🎯 Intent: {overall['overall_intent']}")
-    report.append(f"💰 Purchase Likelihood: {overall['purchase_likelihood']}")
-    report.append(f"😊 Overall Sentiment: {sentiment['overall_sentiment']} ({sentiment['confidence_score']}%)")
-    report.append(f"🎪 Decision Stage: {overall['decision_stage']}")
-    report.append(f"🤝 Commitment Level: {overall['commitment_level']}")
-    report.append("")
+    w("📊 EXECUTIVE SUMMARY")
+    w("-" * 40)
+    w(f"🎯 Intent: {overall['overall_intent']}")
+    w(f"💰 Purchase Likelihood: {overall['purchase_likelihood']}")
+    w(f"😊 Overall Sentiment: {sentiment['overall_sentiment']} ({sentiment['confidence_score']}%)")
+    w(f"🎪 Decision Stage: {overall['decision_stage']}")
+    w(f"🤝 Commitment Level: {overall['commitment_level']}")
+    w()
     
     # Cost Analysis Section
     token_info = clean_data['token_usage']
     cost_info = clean_data['cost_breakdown']
-    report.append("💰 GPT-4o MINI COST ANALYSIS")
-    report.append("-" * 40)
-    report.append(f"🔄 API Calls Made: {token_info['api_calls_made']}")
-    report.append(f"📝 Input Tokens: {token_info['total_input_tokens']:,}")
-    report.append(f"📤 Output Tokens: {token_info['total_output_tokens']:,}")
-    report.append(f"🔢 Total Tokens: {token_info['total_tokens']:,}")
-    report.append("")
-    report.append(f"💵 Cost Breakdown (USD):")
-    report.append(f"   • Input Cost: ${cost_info['input_cost_usd']:.6f}")
-    report.append(f"   • Output Cost: ${cost_info['output_cost_usd']:.6f}")
-    report.append(f"   • Total Cost: ${cost_info['total_cost_usd']:.6f}")
-    report.append("")
-    report.append(f"💸 Cost Breakdown (INR @ ₹{cost_info['usd_to_inr_rate']}):")
-    report.append(f"   • Input Cost: ₹{cost_info['input_cost_inr']:.4f}")
-    report.append(f"   • Output Cost: ₹{cost_info['output_cost_inr']:.4f}")
-    report.append(f"   • Total Cost: ₹{cost_info['total_cost_inr']:.4f}")
-    report.append("")
+    w("💰 GPT-4o MINI COST ANALYSIS")
+    w("-" * 40)
+    w(f"🔄 API Calls Made: {token_info['api_calls_made']}")
+    w(f"♻️  Served From Cache: {token_info['cached_calls']} ({token_info['cached_tokens']:,} tokens, not billed)")
+    w(f"📝 Input Tokens: {token_info['total_input_tokens']:,}")
+    w(f"📤 Output Tokens: {token_info['total_output_tokens']:,}")
+    w(f"🔢 Total Tokens: {token_info['total_tokens']:,}")
+    w()
+    w(f"💵 Cost Breakdown (USD):")
+    w(f"   • Input Cost: ${cost_info['input_cost_usd']:.6f}")
+    w(f"   • Output Cost: ${cost_info['output_cost_usd']:.6f}")
+    w(f"   • Total Cost: ${cost_info['total_cost_usd']:.6f}")
+    w()
+    w(f"💸 Cost Breakdown (INR @ ₹{cost_info['usd_to_inr_rate']}):")
+    w(f"   • Input Cost: ₹{cost_info['input_cost_inr']:.4f}")
+    w(f"   • Output Cost: ₹{cost_info['output_cost_inr']:.4f}")
+    w(f"   • Total Cost: ₹{cost_info['total_cost_inr']:.4f}")
+    w()
     
     # Key Insights
-    report.append("🔍 KEY INSIGHTS")
-    report.append("-" * 40)
+    w("🔍 KEY INSIGHTS")
+    w("-" * 40)
     
-    report.append("✅ PRIMARY INTERESTS:")
+    w("✅ PRIMARY INTERESTS:")
     for interest in overall['key_interests']:
-        report.append(f"   • {interest}")
-    report.append("")
+        w(f"   • {interest}")
+    w()
     
-    report.append("⚠️  CONCERNS & OBJECTIONS:")
+    w("⚠️  CONCERNS & OBJECTIONS:")
     for concern in overall['concerns_objections']:
-        report.append(f"   • {concern}")
-    report.append("")
+        w(f"   • {concern}")
+    w()
     
-    report.append("🚀 BUYING SIGNALS:")
+    w("🚀 BUYING SIGNALS:")
     for signal in overall['buying_signals']:
-        report.append(f"   • {signal}")
-    report.append("")
+        w(f"   • {signal}")
+    w()
     
-    report.append("💬 SENTIMENT INDICATORS:")
+    w("💬 SENTIMENT INDICATORS:")
     for indicator in sentiment['sentiment_indicators']:
-        report.append(f"   • \"{indicator}\"")
-    report.append("")
+        w(f"   • \"{indicator}\"")
+    w()
     
     # Detailed Analysis
-    report.append("📝 DETAILED ANALYSIS")
-    report.append("-" * 40)
-    report.append(overall['detailed_analysis'])
-    report.append("")
+    w("📝 DETAILED ANALYSIS")
+    w("-" * 40)
+    w(overall['detailed_analysis'])
+    w()
     
     # Conversation Flow
-    report.append("📈 CONVERSATION FLOW ANALYSIS")
-    report.append("-" * 40)
+    w("📈 CONVERSATION FLOW ANALYSIS")
+    w("-" * 40)
     
     metrics = clean_data['summary_metrics']
-    report.append(f"📊 Summary Metrics:")
-    report.append(f"   • Segments with Buying Signals: {metrics['segments_with_buying_signals']}/{metrics['total_segments']}")
-    report.append(f"   • High Engagement Segments: {metrics['high_engagement_segments']}/{metrics['total_segments']}")
-    report.append(f"   • Positive: {metrics['positive_segments']} | Neutral: {metrics['neutral_segments']} | Negative: {metrics['negative_segments']}")
-    report.append("")
+    w(f"📊 Summary Metrics:")
+    w(f"   • Segments with Buying Signals: {metrics['segments_with_buying_signals']}/{metrics['total_segments']}")
+    w(f"   • High Engagement Segments: {metrics['high_engagement_segments']}/{metrics['total_segments']}")
+    w(f"   • Positive: {metrics['positive_segments']} | Neutral: {metrics['neutral_segments']} | Negative: {metrics['negative_segments']}")
+    w()
     
     # Segment-by-segment analysis
     for segment in clean_data['conversation_flow']:
@@ -510,39 +843,39 @@ def create_formatted_report(clean_data, output_file):
         engagement_emoji = {"High": "🔥", "Medium": "⚡", "Low": "💤"}.get(seg_data['engagement'], "⚡")
         buying_signal_emoji = "✅" if seg_data['buying_signals'] == 'Yes' else "❌"
         
-        report.append(f"📍 Segment {segment['segment']} ({segment['time_range']})")
-        report.append(f"   {sentiment_emoji} Sentiment: {seg_data['sentiment']}")
-        report.append(f"   {engagement_emoji} Engagement: {seg_data['engagement']}")
-        report.append(f"   {buying_signal_emoji} Buying Signals: {seg_data['buying_signals']}")
+        w(f"📍 Segment {segment['segment']} ({segment['time_range']})")
+        w(f"   {sentiment_emoji} Sentiment: {seg_data['sentiment']}")
+        w(f"   {engagement_emoji} Engagement: {seg_data['engagement']}")
+        w(f"   {buying_signal_emoji} Buying Signals: {seg_data['buying_signals']}")
         
         if seg_data.get('key_points'):
-            report.append(f"   🔑 Key Points:")
+            w(f"   🔑 Key Points:")
             for point in seg_data['key_points']:
-                report.append(f"      • {point}")
-        report.append("")
+                w(f"      • {point}")
+        w()
     
     # Sales Recommendations
-    report.append("🎯 SALES RECOMMENDATIONS")
-    report.append("-" * 40)
+    w("🎯 SALES RECOMMENDATIONS")
+    w("-" * 40)
     
     if overall['purchase_likelihood'] == 'High':
-        report.append("🚀 HIGH PRIORITY LEAD - Act Fast!")
-        report.append("   • Schedule immediate follow-up within 24 hours")
-        report.append("   • Prepare customized proposal addressing specific concerns")
-        report.append("   • Focus on value proposition for unique experiences")
+        w("🚀 HIGH PRIORITY LEAD - Act Fast!")
+        w("   • Schedule immediate follow-up within 24 hours")
+        w("   • Prepare customized proposal addressing specific concerns")
+        w("   • Focus on value proposition for unique experiences")
     
     if overall['commitment_level'] == 'High':
-        report.append("   • Customer is ready to make decisions - present clear options")
-        report.append("   • Address accommodation concerns immediately")
-        report.append("   • Provide detailed cost breakdown for transparency")
+        w("   • Customer is ready to make decisions - present clear options")
+        w("   • Address accommodation concerns immediately")
+        w("   • Provide detailed cost breakdown for transparency")
     
-    report.append("")
-    report.append("=" * 80)
-    report.append("🎉 Analysis Complete - Ready for Sales Action!")
+    w()
+    w("=" * 80)
+    w("🎉 Analysis Complete - Ready for Sales Action!")
     
     # Write to file
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(report))
+        f.write(report.getvalue())
 
 def display_console_summary(clean_data):
     """Display a summary in the console."""
@@ -567,6 +900,7 @@ def display_console_summary(clean_data):
     # Token usage and cost breakdown
     print(f"\n💰 GPT-4o Mini Usage & Cost:")
     print(f"   🔄 API Calls Made: {token_info['api_calls_made']}")
+    print(f"   ♻️  Served From Cache: {token_info['cached_calls']} ({token_info['cached_tokens']:,} tokens, not billed)")
     print(f"   📝 Input Tokens: {token_info['total_input_tokens']:,}")
     print(f"   📤 Output Tokens: {token_info['total_output_tokens']:,}")
     print(f"   🔢 Total Tokens: {token_info['total_tokens']:,}")
@@ -589,13 +923,16 @@ def display_console_summary(clean_data):
     print(f"   • High Engagement Segments: {metrics['high_engagement_segments']}/{metrics['total_segments']}")
     print(f"   • Sentiment Distribution: Positive({metrics['positive_segments']}) | Neutral({metrics['neutral_segments']}) | Negative({metrics['negative_segments']})")
 
-def main(file_path):
+def main(file_path, batch=False):
     print("🚀 Starting Integrated Customer Analysis...")
     print("="*60)
     
-    # Step 1: Calculate talk times
+    # Each run reports only its own calls, tokens and cost
+    reset_token_usage()
+    
+    # Step 1: Parse talk times and customer statements in one pass over the file
     print("⏱️  Step 1: Calculating talk times...")
-    talk_times = calculate_talk_times(file_path)
+    talk_times, customer_lines = parse_transcript(file_path)
     
     # Display talk time analysis
     print(f"\n{'='*50}")
@@ -605,42 +942,40 @@ def main(file_path):
     total_time = sum(talk_times.values(), timedelta())
     
     for role, duration in talk_times.items():
-        total_seconds = duration.total_seconds()
-        minutes = int(total_seconds // 60)
-        seconds = int(total_seconds % 60)
-        percentage = (duration.total_seconds() / total_time.total_seconds()) * 100 if total_time.total_seconds() > 0 else 0
-        
-        print(f"{role:12}: {minutes:2d}m {seconds:2d}s ({percentage:.1f}%)")
+        percentage = _pct(duration.total_seconds(), total_time.total_seconds())
+        print(f"{role:12}: {_fmt_dur(duration, width=2)} ({percentage:.1f}%)")
     
-    total_seconds = total_time.total_seconds()
-    total_minutes = int(total_seconds // 60)
-    total_seconds_remainder = int(total_seconds % 60)
-    print(f"{'Total':12}: {total_minutes:2d}m {total_seconds_remainder:2d}s (100.0%)")
+    print(f"{'Total':12}: {_fmt_dur(total_time, width=2)} (100.0%)")
     print(f"{'='*50}")
     
-    # Step 2: Extract customer lines
+    # Step 2: Customer lines were extracted during the same pass
     print("\n📝 Step 2: Extracting customer statements...")
-    customer_lines = extract_customer_lines(file_path)
     
     if not customer_lines:
         print("❌ No customer statements found in the file!")
         return
     
-    # Step 3: Perform overall analysis
+    # Steps 3 & 4: Overall analysis and conversation flow run concurrently
     print("🎯 Step 3: Analyzing overall intent and sentiment...")
-    overall_analysis = analyze_customer_intent_and_sentiment(customer_lines)
+    print("🔄 Step 4: Analyzing conversation flow...")
+    if batch:
+        print("📦 Using the OpenAI Batch API - this can take up to 24 hours...")
+        overall_analysis, segment_analysis = asyncio.run(run_batch_analyses(customer_lines))
+    else:
+        overall_analysis, segment_analysis = asyncio.run(run_analyses(customer_lines))
     
     if not overall_analysis:
         print("❌ Failed to analyze customer intent!")
         return
     
-    # Step 4: Analyze conversation flow
-    print("🔄 Step 4: Analyzing conversation flow...")
-    segment_analysis = analyze_conversation_flow(customer_lines)
-    
     # Step 5: Clean and structure the data
     print("🧹 Step 5: Cleaning and structuring data...")
-    clean_data = clean_and_structure_data(overall_analysis, segment_analysis, len(customer_lines), talk_times)
+    try:
+        clean_data = clean_and_structure_data(overall_analysis, segment_analysis, len(customer_lines), talk_times, batch)
+    except ValueError as e:
+        # e.g. an overall analysis cut off at max_tokens is not valid JSON
+        print(f"❌ Failed to parse the customer intent analysis: {e}")
+        return
     
     # Step 6: Generate outputs
     print("📄 Step 6: Generating reports...")
@@ -650,8 +985,7 @@ def main(file_path):
     
     # Save clean JSON
     clean_json_file = f"{base_name}_ANALYSIS.json"
-    with open(clean_json_file, 'w', encoding='utf-8') as f:
-        json.dump(clean_data, f, indent=2, ensure_ascii=False)
+    write_json(clean_json_file, clean_data)
     
     # Create formatted report
     report_file = f"{base_name}_REPORT.txt"
@@ -669,9 +1003,11 @@ def main(file_path):
 if __name__ == "__main__":
     import sys
     
-    # Allow command line arguments or use default
-    if len(sys.argv) >= 2:
-        file_path = sys.argv[1]
+    # Allow command line arguments or use default; --batch submits via the Batch API
+    batch = '--batch' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--batch']
+    if args:
+        file_path = args[0]
     else:
         file_path = "CALL_1117711_speaker_segmented.txt"
     
@@ -680,4 +1016,4 @@ if __name__ == "__main__":
         print("Please ensure the transcript file exists in the current directory.")
         sys.exit(1)
     
-    main(file_path)
\ No newline at end of file
+    main(file_path, batch)
\ No newline at end of file
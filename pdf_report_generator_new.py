@@ -1,124 +1,445 @@
+import hashlib
 import json
 import os
 import sys
+import threading
 from datetime import datetime
+from functools import cached_property, lru_cache
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Flowable
 from reportlab.platypus import Image as RLImage
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
+from reportlab import rl_config
+from importlib.util import find_spec
+from typing import Final
+# matplotlib is only imported when the first chart is drawn (see _get_plt)
+MATPLOTLIB_AVAILABLE: Final[bool] = find_spec('matplotlib') is not None
+if not MATPLOTLIB_AVAILABLE:
+    print("⚠️ Warning: matplotlib not available. Charts will be skipped.")
 try:
-    import matplotlib.pyplot as plt
-    import matplotlib.patches as patches
-    MATPLOTLIB_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    MATPLOTLIB_AVAILABLE = False
-    print("⚠️ Warning: matplotlib not available. Charts will be skipped.")
+    ORJSON_AVAILABLE = False
 from io import BytesIO
 
+# Write binary PDF streams instead of ASCII85-encoding them (smaller and cheaper to produce)
+rl_config.useA85 = 0
+
+# Report colors, parsed once at import
+_C_NAVY = colors.HexColor('#2C3E50')
+_C_SLATE = colors.HexColor('#34495E')
+_C_DARK_BLUE = colors.HexColor('#2980B9')
+_C_BLUE = colors.HexColor('#3498DB')
+_C_BLUE_BG = colors.HexColor('#EBF3FD')
+_C_BLUE_HIGHLIGHT = colors.HexColor('#E8F4FD')
+_C_DARK_GREEN = colors.HexColor('#27AE60')
+_C_GREEN = colors.HexColor('#2ECC71')
+_C_GREEN_BG = colors.HexColor('#E8F8F5')
+_C_RED = colors.HexColor('#E74C3C')
+_C_RED_BG = colors.HexColor('#FADBD8')
+_C_ORANGE = colors.HexColor('#E67E22')
+_C_ORANGE_BG = colors.HexColor('#FDF2E9')
+_C_GRAY = colors.HexColor('#7F8C8D')
+_C_LIGHT_GRAY = colors.HexColor('#BDC3C7')
+_C_TOTAL_BG = colors.HexColor('#D5DBDB')
+_C_GRAY_BG = colors.HexColor('#F8F9FA')
+_C_GRID = colors.HexColor('#DEE2E6')
+
+def read_json(path):
+    """Read and parse a UTF-8 JSON file, using orjson when it is installed."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Table styles shared by every report; each table applies its style with a single setStyle
+_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), _C_GRAY_BG),
+    ('GRID', (0, 0), (-1, -1), 1, _C_GRID)
+])
+
+_ANALYSIS_COST_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), _C_GRAY_BG),
+    ('GRID', (0, 0), (-1, -1), 1, _C_GRID),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    # Highlight total cost rows
+    ('BACKGROUND', (0, 7), (-1, 7), _C_BLUE_HIGHLIGHT),  # Total USD
+    ('BACKGROUND', (0, 10), (-1, 10), _C_BLUE_HIGHLIGHT),  # Total INR
+    ('FONTNAME', (0, 7), (-1, 7), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 10), (-1, 10), 'Helvetica-Bold'),
+])
+
+_SEGMENTATION_COST_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_ORANGE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), _C_GRAY_BG),
+    ('GRID', (0, 0), (-1, -1), 1, _C_GRID),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    # Highlight total cost rows
+    ('BACKGROUND', (0, 8), (-1, 8), _C_ORANGE_BG),  # Total USD
+    ('BACKGROUND', (0, 11), (-1, 11), _C_ORANGE_BG),  # Total INR
+    ('FONTNAME', (0, 8), (-1, 8), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 11), (-1, 11), 'Helvetica-Bold'),
+])
+
+_COMBINED_COST_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_GREEN),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, 2), _C_GRAY_BG),
+    ('BACKGROUND', (0, 3), (-1, 3), _C_TOTAL_BG),
+    ('FONTNAME', (0, 3), (-1, 3), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 1, _C_GRID),
+    ('FONTNAME', (0, 1), (-1, 2), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+])
+
+# The next steps table is the same in every report, so its geometry is fixed here and it is
+# drawn straight onto the canvas by NextStepsTable instead of going through Table layout
+_NEXT_STEPS_ROWS = (
+    ('Action Item', 'Timeline', 'Priority'),
+    ('Follow-up Call', '24-48 hours', 'High'),
+    ('Send Proposal', '1-2 business days', 'High'),
+    ('Address Concerns', 'During follow-up', 'Medium'),
+    ('Booking Assistance', 'As needed', 'Medium')
+)
+_NEXT_STEPS_COL_WIDTHS = (3*inch, 2*inch, 1.5*inch)
+_NEXT_STEPS_HEADER_HEIGHT = 27  # 12pt leading + 3pt top / 12pt bottom padding
+_NEXT_STEPS_ROW_HEIGHT = 18     # 12pt leading + 3pt top / 3pt bottom padding
+
+class NextStepsTable(Flowable):
+    """Fixed-layout next steps table drawn with canvas calls, without a Table layout pass."""
+    
+    def __init__(self):
+        super().__init__()
+        self.hAlign = 'CENTER'
+        self.width = sum(_NEXT_STEPS_COL_WIDTHS)
+        self.height = _NEXT_STEPS_HEADER_HEIGHT + _NEXT_STEPS_ROW_HEIGHT * (len(_NEXT_STEPS_ROWS) - 1)
+    
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+    
+    def draw(self):
+        c = self.canv
+        c.saveState()
+        body_height = self.height - _NEXT_STEPS_HEADER_HEIGHT
+        
+        # Backgrounds: red header row over a pale red body
+        c.setFillColor(_C_RED)
+        c.rect(0, body_height, self.width, _NEXT_STEPS_HEADER_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(_C_RED_BG)
+        c.rect(0, 0, self.width, body_height, stroke=0, fill=1)
+        
+        # Cell text, centred and baseline-aligned the way Table positions bottom-aligned cells
+        col_centres = []
+        x = 0
+        for col_width in _NEXT_STEPS_COL_WIDTHS:
+            col_centres.append(x + col_width / 2)
+            x += col_width
+        
+        c.setFillColor(colors.whitesmoke)
+        c.setFont('Helvetica-Bold', 12, 12)
+        for cx, text in zip(col_centres, _NEXT_STEPS_ROWS[0]):
+            c.drawCentredString(cx, body_height + 12, text)
+        
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica', 10, 12)
+        row_bottom = body_height
+        for row in _NEXT_STEPS_ROWS[1:]:
+            row_bottom -= _NEXT_STEPS_ROW_HEIGHT
+            for cx, text in zip(col_centres, row):
+                c.drawCentredString(cx, row_bottom + 5, text)
+        
+        # 1pt red grid around every cell
+        c.setStrokeColor(_C_RED)
+        c.setLineWidth(1)
+        c.setLineCap(1)
+        for y in [self.height, body_height] + [body_height - _NEXT_STEPS_ROW_HEIGHT * i for i in range(1, len(_NEXT_STEPS_ROWS))]:
+            c.line(0, y, self.width, y)
+        x = 0
+        for col_width in (0,) + _NEXT_STEPS_COL_WIDTHS:
+            x += col_width
+            c.line(x, 0, x, self.height)
+        c.restoreState()
+
+@lru_cache(maxsize=64)
+def _load_json_cached(path, mtime):
+    """Read and parse a JSON file; the mtime argument invalidates stale cache entries."""
+    # The report reads every section, so one eager (orjson) parse beats streaming sections on demand
+    return read_json(path)
+
+def _build_base_styles():
+    """Build the sample stylesheet with the custom report styles added."""
+    styles = getSampleStyleSheet()
+    
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=_C_NAVY,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomSectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor=_C_SLATE,
+        fontName='Helvetica-Bold',
+        borderWidth=1,
+        borderColor=_C_BLUE,
+        borderPadding=8,
+        backColor=_C_BLUE_BG
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomSubHeader',
+        parent=styles['Heading3'],
+        fontSize=14,
+        spaceAfter=8,
+        spaceBefore=12,
+        textColor=_C_DARK_BLUE,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomBodyText',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=6,
+        alignment=TA_JUSTIFY,
+        fontName='Helvetica'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomBulletPoint',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=4,
+        leftIndent=20,
+        fontName='Helvetica'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomHighlightBox',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=12,
+        spaceBefore=12,
+        borderWidth=2,
+        borderColor=_C_RED,
+        borderPadding=12,
+        backColor=_C_RED_BG,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomMetricBox',
+        parent=styles['Normal'],
+        fontSize=11,
+        alignment=TA_CENTER,
+        borderWidth=1,
+        borderColor=_C_DARK_GREEN,
+        borderPadding=8,
+        backColor=_C_GREEN_BG,
+        fontName='Helvetica-Bold'
+    ))
+    
+    return styles
+
+@lru_cache(maxsize=None)
+def _get_plt():
+    """Import pyplot on first use, on the headless Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')  # Headless backend; charts are only rendered to buffers
+    import matplotlib.pyplot as plt
+    return plt
+
+# Chart figures are created once and cleared per chart instead of re-allocated;
+# the lock keeps concurrent generators from drawing on the same figure
+@lru_cache(maxsize=None)
+def _get_figure(figsize):
+    """Shared figure of the given size, created on first use."""
+    return _get_plt().figure(figsize=figsize)
+
+_CHART_LOCK = threading.Lock()
+
+# Per-thread scratch buffer that charts are saved into
+_IMG_BUF = threading.local()
+
+def _get_chart_buffer():
+    """Return this thread's chart buffer, emptied for the next save."""
+    buf = getattr(_IMG_BUF, 'buffer', None)
+    if buf is None:
+        buf = _IMG_BUF.buffer = BytesIO()
+    else:
+        buf.seek(0)
+        buf.truncate(0)
+    return buf
+
+# 100 dpi JPEG renders faster and embeds far smaller than 150 dpi PNG; tight_layout
+# replaces bbox_inches='tight', which needs an extra render pass to measure bounds
+_CHART_SAVE_OPTIONS = {'format': 'jpeg', 'dpi': 100, 'pil_kwargs': {'quality': 85, 'optimize': True}}
+
+# Paragraph markup templates, filled with str.format / format_map
+_METADATA_TMPL = (
+    "<b>Analysis Date:</b> {analysis_date}<br/>"
+    "<b>Call Duration:</b> {actual_call_duration}<br/>"
+    "<b>Customer Statements:</b> {total_customer_statements}<br/>"
+    "<b>Customer Talk Time:</b> {talk_time_breakdown[customer_time]} ({talk_time_breakdown[customer_percentage]}%)<br/>"
+    "<b>Agent Talk Time:</b> {talk_time_breakdown[agent_time]} ({talk_time_breakdown[agent_percentage]}%)"
+)
+
+_PIPELINE_COST_TMPL = (
+    "<b>💰 Complete Pipeline Cost Summary</b><br/>"
+    "<b>Segmentation:</b> ${seg[total_cost_usd]} USD / ₹{seg[total_cost_inr]} INR ({seg[total_tokens]:,} tokens)<br/>"
+    "<b>Analysis:</b> ${cost[total_cost_usd]} USD / ₹{cost[total_cost_inr]} INR ({tokens[total_tokens]:,} tokens)<br/>"
+    "<b>Total Pipeline Cost:</b> ${total_cost_usd:.6f} USD / ₹{total_cost_inr:.4f} INR<br/>"
+    "<b>Total Tokens:</b> {total_tokens:,} | <b>Exchange Rate:</b> $1 = ₹{cost[usd_to_inr_rate]}"
+)
+
+_ANALYSIS_COST_TMPL = (
+    "<b>💰 GPT-4o Mini Usage & Cost Analysis</b><br/>"
+    "<b>API Calls Made:</b> {tokens[api_calls_made]}<br/>"
+    "<b>Total Tokens:</b> {tokens[total_tokens]:,} (Input: {tokens[total_input_tokens]:,}, Output: {tokens[total_output_tokens]:,})<br/>"
+    "<b>Total Cost:</b> ${cost[total_cost_usd]} USD / ₹{cost[total_cost_inr]} INR<br/>"
+    "<b>Exchange Rate:</b> $1 = ₹{cost[usd_to_inr_rate]}"
+)
+
+_PIPELINE_EFFICIENCY_TMPL = (
+    "<b>💡 Complete Pipeline Cost Efficiency:</b><br/>"
+    "• Total pipeline cost: ${total_cost_usd:.6f} USD / ₹{total_cost_inr:.4f} INR<br/>"
+    "• Cost per 1,000 tokens: ${cost_per_1k_usd:.4f} USD / ₹{cost_per_1k_inr:.2f} INR<br/>"
+    "• Exchange rate used: $1 = ₹{exchange_rate}<br/>"
+    "• Segmentation vs Analysis cost ratio: {seg_pct:.1f}% : {analysis_pct:.1f}%<br/>"
+    "• Total tokens processed: {total_tokens:,} ({seg[total_tokens]:,} segmentation + {tokens[total_tokens]:,} analysis)"
+)
+
+_ANALYSIS_EFFICIENCY_TMPL = (
+    "<b>💡 Analysis Step Cost Efficiency:</b><br/>"
+    "• Cost per 1,000 tokens: ${cost_per_1k_usd:.4f} USD / ₹{cost_per_1k_inr:.2f} INR<br/>"
+    "• Average tokens per API call: {tokens_per_call:,}<br/>"
+    "• Input/Output ratio: {tokens[total_input_tokens]}/{tokens[total_output_tokens]} "
+    "({input_pct:.1f}% input, {output_pct:.1f}% output)<br/>"
+    "• Exchange rate used: $1 = ₹{exchange_rate}"
+)
+
+_KEY_FINDINGS_TMPL = (
+    "<b>🎯 Overall Intent:</b> {overall_intent}<br/><br/>"
+    "<b>💰 Purchase Likelihood:</b> {purchase_likelihood}<br/><br/>"
+    "<b>😊 Overall Sentiment:</b> {sentiment_analysis[overall_sentiment]} ({sentiment_analysis[confidence_score]}%)<br/><br/>"
+    "<b>🎪 Decision Stage:</b> {decision_stage}<br/><br/>"
+    "<b>🤝 Commitment Level:</b> {commitment_level}"
+)
+
+_SEGMENT_TMPL = (
+    "<b>Segment {segment} ({time_range})</b><br/>"
+    "{sentiment_emoji} <b>Sentiment:</b> {analysis[sentiment]}<br/>"
+    "{engagement_emoji} <b>Engagement:</b> {analysis[engagement]}<br/>"
+    "{buying_signal_emoji} <b>Buying Signals:</b> {analysis[buying_signals]}"
+)
+
+# Segments rendered per Paragraph in the conversation flow section
+SEGMENTS_PER_PARAGRAPH = 10
+_BULLET_INDENT = "&nbsp;" * 6
+
+# Conversation flow emoji lookups
+_SENT_EMOJI = {"Positive": "😊", "Neutral": "😐", "Negative": "😞"}
+_ENG_EMOJI = {"High": "🔥", "Medium": "⚡", "Low": "💤"}
+
+# Engagement chart lookups
+_ENG_MAP = {'High': 3, 'Medium': 2, 'Low': 1}
+_ENG_TEXT = {3: 'High', 2: 'Medium', 1: 'Low'}
+_SENT_COLORS = {'Positive': '#2ECC71', 'Neutral': '#F39C12', 'Negative': '#E74C3C'}
+
+# Sales recommendations by purchase likelihood (anything unrecognised gets the Low set)
+_LOW_RECS = (
+    "Schedule gentle follow-up in 1 week",
+    "Focus on education and relationship building",
+    "Address budget constraints with flexible options",
+    "Keep in nurture sequence for future opportunities"
+)
+_RECS_BY_LIKELIHOOD = {
+    'High': (
+        "Schedule immediate follow-up within 24 hours",
+        "Prepare customized proposal addressing specific concerns",
+        "Focus on value proposition for unique experiences",
+        "Provide detailed cost breakdown for transparency"
+    ),
+    'Medium': (
+        "Schedule follow-up within 48-72 hours",
+        "Address specific concerns raised during the call",
+        "Provide additional information about packages",
+        "Follow up with promotional offers if appropriate"
+    ),
+    'Low': _LOW_RECS
+}
+
+# Extra recommendations by commitment level
+_RECS_BY_COMMITMENT = {
+    'High': (
+        "Customer is ready to make decisions - present clear options",
+        "Focus on closing techniques and next steps",
+        "Prepare booking documentation"
+    )
+}
+
+# Built once at import and copied per generator instead of re-adding the styles each time
+_BASE_STYLES = _build_base_styles()
+
 class CustomerAnalysisPDFGenerator:
     def __init__(self, json_file_path):
         """Initialize the PDF generator with analysis data."""
         self.json_file_path = json_file_path
         self.data = self.load_json_data()
-        self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
         
     def load_json_data(self):
         """Load the analysis data from JSON file."""
         try:
-            with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_json_cached(self.json_file_path, os.path.getmtime(self.json_file_path))
         except Exception as e:
             print(f"Error loading JSON file: {e}")
             return None
     
     def setup_custom_styles(self):
         """Create custom paragraph styles for the PDF."""
-        # Helper function to safely add styles
-        def safe_add_style(style):
-            if style.name not in self.styles:
-                self.styles.add(style)
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2C3E50'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomSectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.HexColor('#34495E'),
-            fontName='Helvetica-Bold',
-            borderWidth=1,
-            borderColor=colors.HexColor('#3498DB'),
-            borderPadding=8,
-            backColor=colors.HexColor('#EBF3FD')
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomSubHeader',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            spaceAfter=8,
-            spaceBefore=12,
-            textColor=colors.HexColor('#2980B9'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomBodyText',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=6,
-            alignment=TA_JUSTIFY,
-            fontName='Helvetica'
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomBulletPoint',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=4,
-            leftIndent=20,
-            fontName='Helvetica'
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomHighlightBox',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            spaceAfter=12,
-            spaceBefore=12,
-            borderWidth=2,
-            borderColor=colors.HexColor('#E74C3C'),
-            borderPadding=12,
-            backColor=colors.HexColor('#FADBD8'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        safe_add_style(ParagraphStyle(
-            name='CustomMetricBox',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            alignment=TA_CENTER,
-            borderWidth=1,
-            borderColor=colors.HexColor('#27AE60'),
-            borderPadding=8,
-            backColor=colors.HexColor('#E8F8F5'),
-            fontName='Helvetica-Bold'
-        ))
+        # StyleSheet1 can't go through copy.copy (its __getattr__ recurses), so clone the
+        # lookup tables; the style objects themselves are shared and treated as read-only
+        self.styles = StyleSheet1()
+        self.styles.byName = dict(_BASE_STYLES.byName)
+        self.styles.byAlias = dict(_BASE_STYLES.byAlias)
 
     def create_header_footer(self, canvas, doc):
         """Create header and footer for each page."""
@@ -126,23 +447,23 @@ class CustomerAnalysisPDFGenerator:
         
         # Header
         canvas.setFont('Helvetica-Bold', 10)
-        canvas.setFillColor(colors.HexColor('#2C3E50'))
+        canvas.setFillColor(_C_NAVY)
         canvas.drawString(inch, letter[1] - 0.75*inch, "Customer Intent & Sentiment Analysis Report")
         canvas.drawString(letter[0] - 2*inch, letter[1] - 0.75*inch, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         
         # Header line
-        canvas.setStrokeColor(colors.HexColor('#3498DB'))
+        canvas.setStrokeColor(_C_BLUE)
         canvas.setLineWidth(2)
         canvas.line(inch, letter[1] - 0.85*inch, letter[0] - inch, letter[1] - 0.85*inch)
         
         # Footer
         canvas.setFont('Helvetica', 9)
-        canvas.setFillColor(colors.HexColor('#7F8C8D'))
+        canvas.setFillColor(_C_GRAY)
         canvas.drawString(inch, 0.75*inch, "Confidential - Sales Analysis Report")
         canvas.drawRightString(letter[0] - inch, 0.75*inch, f"Page {doc.page}")
         
         # Footer line
-        canvas.setStrokeColor(colors.HexColor('#BDC3C7'))
+        canvas.setStrokeColor(_C_LIGHT_GRAY)
         canvas.setLineWidth(1)
         canvas.line(inch, 0.9*inch, letter[0] - inch, 0.9*inch)
         
@@ -161,28 +482,32 @@ class CustomerAnalysisPDFGenerator:
             values = [metrics['positive_segments'], metrics['neutral_segments'], metrics['negative_segments']]
             colors_list = ['#2ECC71', '#F39C12', '#E74C3C']
             
-            # Create figure
-            fig, ax = plt.subplots(figsize=(8, 6))
-            
-            # Create pie chart
-            wedges, texts, autotexts = ax.pie(values, labels=sentiments, colors=colors_list, 
-                                            autopct='%1.1f%%', startangle=90, 
-                                            textprops={'fontsize': 12, 'weight': 'bold'})
-            
-            # Customize the chart
-            ax.set_title('Sentiment Distribution Across Conversation Segments', 
-                        fontsize=16, fontweight='bold', pad=20)
-            
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            
-            # Save to BytesIO
-            img_buffer = BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
+            with _CHART_LOCK:
+                # Reuse the module-level figure
+                fig = _get_figure((8, 6))
+                fig.clear()
+                ax = fig.add_subplot(111)
+                
+                # Create pie chart
+                wedges, texts, autotexts = ax.pie(values, labels=sentiments, colors=colors_list, 
+                                                autopct='%1.1f%%', startangle=90, 
+                                                textprops={'fontsize': 12, 'weight': 'bold'})
+                
+                # Customize the chart
+                ax.set_title('Sentiment Distribution Across Conversation Segments', 
+                            fontsize=16, fontweight='bold', pad=20)
+                
+                # Equal aspect ratio ensures that pie is drawn as a circle
+                ax.axis('equal')
+                
+                # Save to BytesIO
+                img_buffer = _get_chart_buffer()
+                fig.tight_layout()
+                fig.savefig(img_buffer, **_CHART_SAVE_OPTIONS)
+                image_data = img_buffer.getvalue()
             
-            return img_buffer
+            # RLImage reads its source lazily at build time, so hand it its own copy
+            return BytesIO(image_data)
         except Exception as e:
             print(f"Error creating sentiment chart: {e}")
             return None
@@ -193,68 +518,65 @@ class CustomerAnalysisPDFGenerator:
             return None
             
         try:
+            plt = _get_plt()
+            import matplotlib.patches as patches
+            import numpy as np
+            
             conversation_flow = self.data['conversation_flow']
             
             # Extract segment data
-            segments = []
-            engagements = []
-            sentiments = []
+            analyses = [segment['analysis'] for segment in conversation_flow]
+            segments = [f"Seg {segment['segment']}" for segment in conversation_flow]
             
-            for segment in conversation_flow:
-                segments.append(f"Seg {segment['segment']}")
+            # Map engagement to numeric values and color based on sentiment
+            engagements = np.fromiter((_ENG_MAP.get(a['engagement'], 1) for a in analyses),
+                                      dtype=np.int8, count=len(analyses))
+            sentiments = [_SENT_COLORS.get(a['sentiment'], '#F39C12') for a in analyses]
+            
+            with _CHART_LOCK:
+                # Reuse the module-level figure
+                fig = _get_figure((12, 6))
+                fig.clear()
+                ax = fig.add_subplot(111)
                 
-                # Map engagement to numeric values
-                eng_map = {'High': 3, 'Medium': 2, 'Low': 1}
-                engagements.append(eng_map.get(segment['analysis']['engagement'], 1))
+                # Create bar chart
+                ax.bar(segments, engagements, color=sentiments, alpha=0.8, edgecolor='black', linewidth=0.5)
                 
-                # Color based on sentiment
-                sent_colors = {'Positive': '#2ECC71', 'Neutral': '#F39C12', 'Negative': '#E74C3C'}
-                sentiments.append(sent_colors.get(segment['analysis']['sentiment'], '#F39C12'))
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            # Create bar chart
-            bars = ax.bar(segments, engagements, color=sentiments, alpha=0.8, edgecolor='black', linewidth=0.5)
-            
-            # Customize the chart
-            ax.set_xlabel('Conversation Segments', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Engagement Level', fontsize=12, fontweight='bold')
-            ax.set_title('Customer Engagement Throughout Conversation', fontsize=16, fontweight='bold', pad=20)
-            ax.set_ylim(0, 3.5)
-            
-            # Y-axis labels
-            ax.set_yticks([1, 2, 3])
-            ax.set_yticklabels(['Low', 'Medium', 'High'])
-            
-            # Add value labels on bars
-            for bar, engagement in zip(bars, engagements):
-                height = bar.get_height()
-                eng_text = {3: 'High', 2: 'Medium', 1: 'Low'}
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                       eng_text[engagement], ha='center', va='bottom', fontweight='bold')
-            
-            # Add legend
-            if MATPLOTLIB_AVAILABLE:
+                # Customize the chart
+                ax.set_xlabel('Conversation Segments', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Engagement Level', fontsize=12, fontweight='bold')
+                ax.set_title('Customer Engagement Throughout Conversation', fontsize=16, fontweight='bold', pad=20)
+                ax.set_ylim(0, 3.5)
+                
+                # Y-axis labels
+                ax.set_yticks([1, 2, 3])
+                ax.set_yticklabels(['Low', 'Medium', 'High'])
+                
+                # Add value labels on bars
+                for x, height, label in zip(range(len(segments)), engagements.tolist(),
+                                            [_ENG_TEXT[e] for e in engagements.tolist()]):
+                    ax.text(x, height + 0.05, label, ha='center', va='bottom', fontweight='bold')
+                
+                # Add legend
                 legend_elements = [patches.Patch(color='#2ECC71', label='Positive Sentiment'),
                                  patches.Patch(color='#F39C12', label='Neutral Sentiment'),
                                  patches.Patch(color='#E74C3C', label='Negative Sentiment')]
                 ax.legend(handles=legend_elements, loc='upper right')
+                
+                # Grid
+                ax.grid(True, alpha=0.3, axis='y')
+                
+                # Rotate x-axis labels if needed
+                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                
+                # Save to BytesIO
+                img_buffer = _get_chart_buffer()
+                fig.tight_layout()
+                fig.savefig(img_buffer, **_CHART_SAVE_OPTIONS)
+                image_data = img_buffer.getvalue()
             
-            # Grid
-            ax.grid(True, alpha=0.3, axis='y')
-            
-            # Rotate x-axis labels if needed
-            plt.xticks(rotation=45, ha='right')
-            
-            # Save to BytesIO
-            img_buffer = BytesIO()
-            plt.tight_layout()
-            plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
-            
-            return img_buffer
+            # RLImage reads its source lazily at build time, so hand it its own copy
+            return BytesIO(image_data)
         except Exception as e:
             print(f"Error creating engagement chart: {e}")
             return None
@@ -268,14 +590,7 @@ class CustomerAnalysisPDFGenerator:
         story.append(Spacer(1, 0.5*inch))
         
         # Call metadata box
-        metadata = self.data['call_metadata']
-        metadata_text = f"""
-        <b>Analysis Date:</b> {metadata['analysis_date']}<br/>
-        <b>Call Duration:</b> {metadata['actual_call_duration']}<br/>
-        <b>Customer Statements:</b> {metadata['total_customer_statements']}<br/>
-        <b>Customer Talk Time:</b> {metadata['talk_time_breakdown']['customer_time']} ({metadata['talk_time_breakdown']['customer_percentage']}%)<br/>
-        <b>Agent Talk Time:</b> {metadata['talk_time_breakdown']['agent_time']} ({metadata['talk_time_breakdown']['agent_percentage']}%)
-        """
+        metadata_text = _METADATA_TMPL.format_map(self.data['call_metadata'])
         story.append(Paragraph(metadata_text, self.styles['CustomMetricBox']))
         story.append(Spacer(1, 0.3*inch))
         
@@ -285,42 +600,27 @@ class CustomerAnalysisPDFGenerator:
             cost_info = self.data['cost_breakdown']
             
             # Load segmentation cost data for cover page
-            segmentation_data = self.load_segmentation_cost_data()
+            segmentation_data = self.segmentation_cost_data
+            seg_cost = segmentation_data['cost_analysis'] if segmentation_data else None
             
-            if segmentation_data:
-                seg_cost = segmentation_data['cost_analysis']
+            if seg_cost:
                 total_cost_usd = cost_info['total_cost_usd'] + seg_cost['total_cost_usd']
                 total_cost_inr = cost_info['total_cost_inr'] + seg_cost['total_cost_inr']
                 total_tokens = token_info['total_tokens'] + seg_cost['total_tokens']
                 
-                cost_text = f"""
-                <b>💰 Complete Pipeline Cost Summary</b><br/>
-                <b>Segmentation:</b> ${seg_cost['total_cost_usd']} USD / ₹{seg_cost['total_cost_inr']} INR ({seg_cost['total_tokens']:,} tokens)<br/>
-                <b>Analysis:</b> ${cost_info['total_cost_usd']} USD / ₹{cost_info['total_cost_inr']} INR ({token_info['total_tokens']:,} tokens)<br/>
-                <b>Total Pipeline Cost:</b> ${total_cost_usd:.6f} USD / ₹{total_cost_inr:.4f} INR<br/>
-                <b>Total Tokens:</b> {total_tokens:,} | <b>Exchange Rate:</b> $1 = ₹{cost_info['usd_to_inr_rate']}
-                """
+                cost_text = _PIPELINE_COST_TMPL.format(
+                    seg=seg_cost, cost=cost_info, tokens=token_info, total_cost_usd=total_cost_usd,
+                    total_cost_inr=total_cost_inr, total_tokens=total_tokens
+                )
             else:
-                cost_text = f"""
-                <b>💰 GPT-4o Mini Usage & Cost Analysis</b><br/>
-                <b>API Calls Made:</b> {token_info['api_calls_made']}<br/>
-                <b>Total Tokens:</b> {token_info['total_tokens']:,} (Input: {token_info['total_input_tokens']:,}, Output: {token_info['total_output_tokens']:,})<br/>
-                <b>Total Cost:</b> ${cost_info['total_cost_usd']} USD / ₹{cost_info['total_cost_inr']} INR<br/>
-                <b>Exchange Rate:</b> $1 = ₹{cost_info['usd_to_inr_rate']}
-                """
+                cost_text = _ANALYSIS_COST_TMPL.format(cost=cost_info, tokens=token_info)
             
             story.append(Paragraph(cost_text, self.styles['CustomMetricBox']))
             story.append(Spacer(1, 0.3*inch))
         
         # Key findings
         overall = self.data['overall_analysis']
-        key_findings = f"""
-        <b>🎯 Overall Intent:</b> {overall['overall_intent']}<br/><br/>
-        <b>💰 Purchase Likelihood:</b> {overall['purchase_likelihood']}<br/><br/>
-        <b>😊 Overall Sentiment:</b> {overall['sentiment_analysis']['overall_sentiment']} ({overall['sentiment_analysis']['confidence_score']}%)<br/><br/>
-        <b>🎪 Decision Stage:</b> {overall['decision_stage']}<br/><br/>
-        <b>🤝 Commitment Level:</b> {overall['commitment_level']}
-        """
+        key_findings = _KEY_FINDINGS_TMPL.format_map(overall)
         
         if overall['purchase_likelihood'] == 'High':
             story.append(Paragraph("🚀 HIGH PRIORITY LEAD - IMMEDIATE ACTION REQUIRED!", self.styles['CustomHighlightBox']))
@@ -330,6 +630,42 @@ class CustomerAnalysisPDFGenerator:
         
         return story
 
+    def layout_cover_page(self, flowables, width, height):
+        """
+        Stack the cover flowables top-down the way the document frame would (overlapping space before/after)
+        Args:
+            flowables: Cover page flowables
+            width: Usable frame width
+            height: Usable frame height
+        Returns:
+            list: (flowable, bottom offset from the frame top) pairs, or None if the cover doesn't fit on one page
+        """
+        layout = []
+        offset = 0
+        prev_space = 0
+        
+        for i, flowable in enumerate(flowables):
+            if i:
+                offset += max(flowable.getSpaceBefore(), prev_space)
+            _, flowable_height = flowable.wrap(width, height - offset)
+            offset += flowable_height
+            if offset > height:
+                return None
+            layout.append((flowable, offset))
+            prev_space = flowable.getSpaceAfter()
+        
+        return layout
+
+    def draw_cover_page(self, canvas, doc, layout):
+        """Draw the laid-out cover page straight onto the first page's canvas."""
+        self.create_header_footer(canvas, doc)
+        
+        # The document frame has 6pt padding on every side
+        x = doc.leftMargin + 6
+        top = doc.bottomMargin + doc.height - 6
+        for flowable, offset in layout:
+            flowable.drawOn(canvas, x, top - offset)
+
     def build_executive_summary(self):
         """Build the executive summary section."""
         story = []
@@ -343,27 +679,21 @@ class CustomerAnalysisPDFGenerator:
         
         # Create summary metrics table
         metrics = self.data['summary_metrics']
+        total = metrics['total_segments']
+        pct = 100.0 / total if total else 0.0
+        buying = metrics['segments_with_buying_signals']
+        high_engagement = metrics['high_engagement_segments']
+        positive = metrics['positive_segments']
+        
         table_data = [
             ['Metric', 'Value', 'Percentage'],
-            ['Segments with Buying Signals', f"{metrics['segments_with_buying_signals']}/{metrics['total_segments']}", 
-             f"{(metrics['segments_with_buying_signals']/metrics['total_segments']*100):.1f}%" if metrics['total_segments'] > 0 else "0%"],
-            ['High Engagement Segments', f"{metrics['high_engagement_segments']}/{metrics['total_segments']}", 
-             f"{(metrics['high_engagement_segments']/metrics['total_segments']*100):.1f}%" if metrics['total_segments'] > 0 else "0%"],
-            ['Positive Sentiment Segments', str(metrics['positive_segments']), 
-             f"{(metrics['positive_segments']/metrics['total_segments']*100):.1f}%" if metrics['total_segments'] > 0 else "0%"],
+            ['Segments with Buying Signals', f"{buying}/{total}", f"{buying*pct:.1f}%"],
+            ['High Engagement Segments', f"{high_engagement}/{total}", f"{high_engagement*pct:.1f}%"],
+            ['Positive Sentiment Segments', str(positive), f"{positive*pct:.1f}%"],
         ]
         
         table = Table(table_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498DB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9FA')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6'))
-        ]))
+        table.setStyle(_SUMMARY_TABLE_STYLE)
         
         story.append(table)
         
@@ -376,6 +706,7 @@ class CustomerAnalysisPDFGenerator:
         story.append(Paragraph("🔍 KEY INSIGHTS", self.styles['CustomSectionHeader']))
         
         overall = self.data['overall_analysis']
+        sentiment_analysis = overall['sentiment_analysis']
         
         # Primary Interests
         story.append(Paragraph("✅ Primary Interests", self.styles['CustomSubHeader']))
@@ -397,7 +728,7 @@ class CustomerAnalysisPDFGenerator:
         
         # Sentiment Indicators
         story.append(Paragraph("💬 Sentiment Indicators", self.styles['CustomSubHeader']))
-        for indicator in overall['sentiment_analysis']['sentiment_indicators']:
+        for indicator in sentiment_analysis['sentiment_indicators']:
             story.append(Paragraph(f"• \"{indicator}\"", self.styles['CustomBulletPoint']))
         
         return story
@@ -417,28 +748,40 @@ class CustomerAnalysisPDFGenerator:
         # Segment details
         story.append(Paragraph("📍 Segment-by-Segment Analysis", self.styles['CustomSubHeader']))
         
+        # Bind the lookups once rather than per segment
+        sent_get = _SENT_EMOJI.get
+        eng_get = _ENG_EMOJI.get
+        
+        chunks = []
         for segment in self.data['conversation_flow']:
             seg_data = segment['analysis']
             
             # Emoji mapping
-            sentiment_emoji = {"Positive": "😊", "Neutral": "😐", "Negative": "😞"}.get(seg_data['sentiment'], "😐")
-            engagement_emoji = {"High": "🔥", "Medium": "⚡", "Low": "💤"}.get(seg_data['engagement'], "⚡")
+            sentiment_emoji = sent_get(seg_data['sentiment'], "😐")
+            engagement_emoji = eng_get(seg_data['engagement'], "⚡")
             buying_signal_emoji = "✅" if seg_data['buying_signals'] == 'Yes' else "❌"
             
-            segment_text = f"""
-            <b>Segment {segment['segment']} ({segment['time_range']})</b><br/>
-            {sentiment_emoji} <b>Sentiment:</b> {seg_data['sentiment']}<br/>
-            {engagement_emoji} <b>Engagement:</b> {seg_data['engagement']}<br/>
-            {buying_signal_emoji} <b>Buying Signals:</b> {seg_data['buying_signals']}
-            """
-            
-            story.append(Paragraph(segment_text, self.styles['CustomBodyText']))
+            segment_text = _SEGMENT_TMPL.format(
+                sentiment_emoji=sentiment_emoji, engagement_emoji=engagement_emoji,
+                buying_signal_emoji=buying_signal_emoji, **segment
+            )
             
             if seg_data.get('key_points'):
-                story.append(Paragraph("🔑 <b>Key Points:</b>", self.styles['CustomBodyText']))
+                segment_text += "<br/>🔑 <b>Key Points:</b>"
                 for point in seg_data['key_points']:
-                    story.append(Paragraph(f"• {point}", self.styles['CustomBulletPoint']))
+                    segment_text += f"<br/>{_BULLET_INDENT}<font size=\"10\">• {point}</font>"
+            
+            chunks.append(segment_text)
             
+            # Each Paragraph goes through ReportLab's pure-Python markup parser,
+            # so several segments share one paragraph
+            if len(chunks) == SEGMENTS_PER_PARAGRAPH:
+                story.append(Paragraph("<br/><br/>".join(chunks), self.styles['CustomBodyText']))
+                story.append(Spacer(1, 0.15*inch))
+                chunks = []
+        
+        if chunks:
+            story.append(Paragraph("<br/><br/>".join(chunks), self.styles['CustomBodyText']))
             story.append(Spacer(1, 0.15*inch))
         
         return story
@@ -457,18 +800,34 @@ class CustomerAnalysisPDFGenerator:
         
         return story
 
-    def load_segmentation_cost_data(self):
-        """Load segmentation cost data from JSON file."""
+    def find_segmentation_cost_file(self):
+        """Locate the segmentation cost file for this analysis."""
+        # The cost file written alongside this analysis takes precedence
+        sibling = self.json_file_path.replace('_ANALYSIS.json', '_SEGMENTATION_COST.json')
+        if sibling != self.json_file_path and os.path.isfile(sibling):
+            return sibling
+        
+        # Otherwise use the first cost file in the same directory
+        base_dir = os.path.dirname(self.json_file_path) or '.'
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('_SEGMENTATION_COST.json'):
+                    return entry.path
+        
+        return None
+
+    @cached_property
+    def segmentation_cost_file(self):
+        """Path of the segmentation cost file (or None), resolved once per generator."""
+        return self.find_segmentation_cost_file()
+
+    @cached_property
+    def segmentation_cost_data(self):
+        """Segmentation cost data from JSON file, loaded once per generator."""
         try:
-            # Try to find segmentation cost file in the same directory
-            base_dir = os.path.dirname(self.json_file_path)
-            
-            # Look for segmentation cost file
-            for file in os.listdir(base_dir):
-                if file.endswith('_SEGMENTATION_COST.json'):
-                    segmentation_file = os.path.join(base_dir, file)
-                    with open(segmentation_file, 'r', encoding='utf-8') as f:
-                        return json.load(f)
+            segmentation_file = self.segmentation_cost_file
+            if segmentation_file:
+                return read_json(segmentation_file)
         except Exception as e:
             print(f"Warning: Could not load segmentation cost data: {e}")
         
@@ -484,7 +843,8 @@ class CustomerAnalysisPDFGenerator:
         story.append(Paragraph("💰 GPT-4o MINI COST ANALYSIS", self.styles['CustomSectionHeader']))
         
         # Load segmentation cost data
-        segmentation_data = self.load_segmentation_cost_data()
+        segmentation_data = self.segmentation_cost_data
+        seg_cost = segmentation_data['cost_analysis'] if segmentation_data else None
         
         # Analysis Step Cost Breakdown
         story.append(Paragraph("📊 Analysis Step Costs", self.styles['CustomSubHeader']))
@@ -508,26 +868,7 @@ class CustomerAnalysisPDFGenerator:
         ]
         
         analysis_table = Table(analysis_table_data, colWidths=[3*inch, 2*inch])
-        analysis_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498DB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9FA')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6')),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
-        
-        # Highlight total cost rows
-        analysis_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 7), (-1, 7), colors.HexColor('#E8F4FD')),  # Total USD
-            ('BACKGROUND', (0, 10), (-1, 10), colors.HexColor('#E8F4FD')),  # Total INR
-            ('FONTNAME', (0, 7), (-1, 7), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 10), (-1, 10), 'Helvetica-Bold'),
-        ]))
+        analysis_table.setStyle(_ANALYSIS_COST_TABLE_STYLE)
         
         story.append(analysis_table)
         story.append(Spacer(1, 0.15*inch))
@@ -536,8 +877,6 @@ class CustomerAnalysisPDFGenerator:
         if segmentation_data:
             story.append(Paragraph("🎯 Segmentation Step Costs", self.styles['CustomSubHeader']))
             
-            seg_cost = segmentation_data['cost_analysis']
-            
             segmentation_table_data = [
                 ['Metric', 'Value'],
                 ['Blocks Processed', str(segmentation_data['blocks_processed'])],
@@ -554,26 +893,7 @@ class CustomerAnalysisPDFGenerator:
             ]
             
             segmentation_table = Table(segmentation_table_data, colWidths=[3*inch, 2*inch])
-            segmentation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E67E22')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9FA')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6')),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ]))
-            
-            # Highlight total cost rows
-            segmentation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 8), (-1, 8), colors.HexColor('#FDF2E9')),  # Total USD
-                ('BACKGROUND', (0, 11), (-1, 11), colors.HexColor('#FDF2E9')),  # Total INR
-                ('FONTNAME', (0, 8), (-1, 8), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 11), (-1, 11), 'Helvetica-Bold'),
-            ]))
+            segmentation_table.setStyle(_SEGMENTATION_COST_TABLE_STYLE)
             
             story.append(segmentation_table)
             story.append(Spacer(1, 0.15*inch))
@@ -591,20 +911,7 @@ class CustomerAnalysisPDFGenerator:
             ]
             
             combined_table = Table(combined_summary_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            combined_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ECC71')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, 2), colors.HexColor('#F8F9FA')),
-                ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#D5DBDB')),
-                ('FONTNAME', (0, 3), (-1, 3), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6')),
-                ('FONTNAME', (0, 1), (-1, 2), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ]))
+            combined_table.setStyle(_COMBINED_COST_TABLE_STYLE)
             
             story.append(Paragraph("💰 Complete Pipeline Cost Summary", self.styles['CustomSubHeader']))
             story.append(combined_table)
@@ -620,29 +927,31 @@ class CustomerAnalysisPDFGenerator:
             total_tokens = token_info['total_tokens']
             exchange_rate = cost_info.get('usd_to_inr_rate', 85.0)
         
-        # Cost efficiency analysis
+        # Cost efficiency analysis (every ratio is guarded, so empty or zero-cost runs still render)
         if total_tokens > 0:
-            cost_per_1k_tokens_usd = (total_cost_usd / total_tokens) * 1000
-            cost_per_1k_tokens_inr = (total_cost_inr / total_tokens) * 1000
+            values = {
+                'seg': seg_cost if segmentation_data else None,
+                'tokens': token_info,
+                'total_cost_usd': total_cost_usd,
+                'total_cost_inr': total_cost_inr,
+                'total_tokens': total_tokens,
+                'exchange_rate': exchange_rate,
+                'cost_per_1k_usd': total_cost_usd / total_tokens * 1000,
+                'cost_per_1k_inr': total_cost_inr / total_tokens * 1000
+            }
             
             if segmentation_data:
-                efficiency_text = f"""
-                <b>💡 Complete Pipeline Cost Efficiency:</b><br/>
-                • Total pipeline cost: ${total_cost_usd:.6f} USD / ₹{total_cost_inr:.4f} INR<br/>
-                • Cost per 1,000 tokens: ${cost_per_1k_tokens_usd:.4f} USD / ₹{cost_per_1k_tokens_inr:.2f} INR<br/>
-                • Exchange rate used: $1 = ₹{exchange_rate}<br/>
-                • Segmentation vs Analysis cost ratio: {(seg_cost['total_cost_inr']/total_cost_inr*100):.1f}% : {(cost_info['total_cost_inr']/total_cost_inr*100):.1f}%<br/>
-                • Total tokens processed: {total_tokens:,} ({seg_cost['total_tokens']:,} segmentation + {token_info['total_tokens']:,} analysis)
-                """
+                seg_pct = seg_cost['total_cost_inr'] / total_cost_inr * 100 if total_cost_inr else 0.0
+                values['seg_pct'] = seg_pct
+                values['analysis_pct'] = 100 - seg_pct if total_cost_inr else 0.0
+                efficiency_text = _PIPELINE_EFFICIENCY_TMPL.format_map(values)
             else:
-                efficiency_text = f"""
-                <b>💡 Analysis Step Cost Efficiency:</b><br/>
-                • Cost per 1,000 tokens: ${cost_per_1k_tokens_usd:.4f} USD / ₹{cost_per_1k_tokens_inr:.2f} INR<br/>
-                • Average tokens per API call: {token_info['total_tokens'] // token_info['api_calls_made']:,}<br/>
-                • Input/Output ratio: {token_info['total_input_tokens']}/{token_info['total_output_tokens']} 
-                ({(token_info['total_input_tokens']/token_info['total_tokens']*100):.1f}% input, {(token_info['total_output_tokens']/token_info['total_tokens']*100):.1f}% output)<br/>
-                • Exchange rate used: $1 = ₹{exchange_rate}
-                """
+                input_pct = token_info['total_input_tokens'] / total_tokens * 100
+                api_calls = token_info['api_calls_made']
+                values['tokens_per_call'] = total_tokens // api_calls if api_calls else 0
+                values['input_pct'] = input_pct
+                values['output_pct'] = 100 - input_pct
+                efficiency_text = _ANALYSIS_EFFICIENCY_TMPL.format_map(values)
             
             story.append(Paragraph(efficiency_text, self.styles['CustomBodyText']))
         
@@ -656,71 +965,62 @@ class CustomerAnalysisPDFGenerator:
         
         overall = self.data['overall_analysis']
         
-        # Priority level recommendations
+        # Priority level and commitment level recommendations
         if overall['purchase_likelihood'] == 'High':
             story.append(Paragraph("🚀 HIGH PRIORITY LEAD - ACT FAST!", self.styles['CustomHighlightBox']))
-            recommendations = [
-                "Schedule immediate follow-up within 24 hours",
-                "Prepare customized proposal addressing specific concerns",
-                "Focus on value proposition for unique experiences",
-                "Provide detailed cost breakdown for transparency"
-            ]
-        elif overall['purchase_likelihood'] == 'Medium':
-            recommendations = [
-                "Schedule follow-up within 48-72 hours",
-                "Address specific concerns raised during the call",
-                "Provide additional information about packages",
-                "Follow up with promotional offers if appropriate"
-            ]
-        else:
-            recommendations = [
-                "Schedule gentle follow-up in 1 week",
-                "Focus on education and relationship building",
-                "Address budget constraints with flexible options",
-                "Keep in nurture sequence for future opportunities"
-            ]
+        recommendations = (_RECS_BY_LIKELIHOOD.get(overall['purchase_likelihood'], _LOW_RECS)
+                           + _RECS_BY_COMMITMENT.get(overall['commitment_level'], ()))
         
-        # Commitment level recommendations
-        if overall['commitment_level'] == 'High':
-            recommendations.extend([
-                "Customer is ready to make decisions - present clear options",
-                "Focus on closing techniques and next steps",
-                "Prepare booking documentation"
-            ])
-        
-        for rec in recommendations:
-            story.append(Paragraph(f"• {rec}", self.styles['CustomBulletPoint']))
+        bullet_style = self.styles['CustomBulletPoint']
+        story.extend([Paragraph(f"• {rec}", bullet_style) for rec in recommendations])
         
         story.append(Spacer(1, 0.3*inch))
         
         # Next steps table
-        next_steps_data = [
-            ['Action Item', 'Timeline', 'Priority'],
-            ['Follow-up Call', '24-48 hours', 'High'],
-            ['Send Proposal', '1-2 business days', 'High'],
-            ['Address Concerns', 'During follow-up', 'Medium'],
-            ['Booking Assistance', 'As needed', 'Medium']
-        ]
-        
-        next_steps_table = Table(next_steps_data, colWidths=[3*inch, 2*inch, 1.5*inch])
-        next_steps_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E74C3C')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FADBD8')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E74C3C'))
-        ]))
-        
         story.append(Paragraph("📋 Next Steps Action Plan", self.styles['CustomSubHeader']))
-        story.append(next_steps_table)
+        story.append(NextStepsTable())
         
         return story
 
-    def generate_pdf(self, output_filename=None):
-        """Generate the complete PDF report."""
+    def input_digest(self):
+        """Content hash of the analysis JSON and the segmentation cost file the report is built from."""
+        digest = hashlib.blake2b(digest_size=16)
+        for path in (self.json_file_path, self.segmentation_cost_file):
+            if path:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
+
+    def build_story(self):
+        """Yield the report flowables after the cover page section by section, in page order."""
+        # Each section builder runs exactly once, followed by the flowable that separates it from the next
+        sections = (
+            (self.build_executive_summary, Spacer(1, 0.5*inch)),
+            (self.build_cost_analysis, Spacer(1, 0.3*inch)),
+            (self.build_key_insights, PageBreak()),
+            (self.build_analytics_dashboard, Spacer(1, 0.3*inch)),
+            (self.build_conversation_flow, PageBreak()),
+            (self.build_recommendations, None)
+        )
+        
+        # The cover page is either drawn directly by draw_cover_page (leaving page 1 empty
+        # in the story) or flowed at the start of the story; either way page 2 starts here
+        yield PageBreak()
+        
+        for build_section, separator in sections:
+            yield from build_section()
+            if separator is not None:
+                yield separator
+    
+    def generate_pdf(self, output_filename=None, force=False):
+        """
+        Generate the complete PDF report
+        Args:
+            output_filename: Output PDF path (defaults to <input>_PROFESSIONAL_REPORT.pdf)
+            force: Rebuild even if the existing PDF was built from identical inputs
+        Returns:
+            bool: True if the report exists and is up to date
+        """
         if not self.data:
             print("No data available to generate PDF!")
             return False
@@ -730,65 +1030,55 @@ class CustomerAnalysisPDFGenerator:
             base_name = os.path.splitext(self.json_file_path)[0]
             output_filename = f"{base_name}_PROFESSIONAL_REPORT.pdf"
         
+        # Skip rendering when the existing PDF was built from the same inputs
+        key_file = f"{output_filename}.key"
+        input_key = self.input_digest()
+        if not force and os.path.exists(output_filename) and os.path.exists(key_file):
+            with open(key_file, 'r', encoding='utf-8') as f:
+                if f.read().strip() == input_key:
+                    print(f"♻️  PDF report is up to date: {output_filename}")
+                    return True
+        
+        # Render to a temporary file and move it into place once complete
+        tmp_filename = f"{output_filename}.tmp"
+        
         # Create the PDF document
         doc = SimpleDocTemplate(
-            output_filename,
+            tmp_filename,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
             topMargin=100,
-            bottomMargin=100
+            bottomMargin=100,
+            pageCompression=1,
+            invariant=1,
+            _pageBreakQuick=1
         )
-          # Build the complete story
-        story = []
-        
-        # Cover page
-        story.extend(self.build_cover_page())
-        story.append(PageBreak())
-        
-        # Executive summary
-        story.extend(self.build_executive_summary())
-        story.append(Spacer(1, 0.5*inch))
-        
-        # Cost analysis section
-        story.extend(self.build_cost_analysis())
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Key insights
-        story.extend(self.build_key_insights())
-        story.append(PageBreak())
-        
-        # Analytics dashboard
-        story.extend(self.build_analytics_dashboard())
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Conversation flow
-        story.extend(self.build_conversation_flow())
-        story.append(PageBreak())
-        
-        # Recommendations
-        story.extend(self.build_recommendations())        # Key insights
-        story.extend(self.build_key_insights())
-        story.append(PageBreak())
-        
-        # Analytics dashboard
-        story.extend(self.build_analytics_dashboard())
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Conversation flow
-        story.extend(self.build_conversation_flow())
-        story.append(PageBreak())
-        
-        # Recommendations
-        story.extend(self.build_recommendations())
         
         # Build the PDF
         try:
-            doc.build(story, onFirstPage=self.create_header_footer, onLaterPages=self.create_header_footer)
+            # A cover that fits on one page skips the layout pass and is drawn straight onto the canvas;
+            # a longer one (e.g. a very long intent) flows through the document onto the next page
+            cover = list(self.build_cover_page())
+            cover_layout = self.layout_cover_page(cover, doc.width - 12, doc.height - 12)
+            if cover_layout is not None:
+                story = list(self.build_story())
+                on_first_page = lambda canvas, doc: self.draw_cover_page(canvas, doc, cover_layout)
+            else:
+                story = cover + list(self.build_story())
+                on_first_page = self.create_header_footer
+            
+            doc.build(story, onFirstPage=on_first_page, onLaterPages=self.create_header_footer)
+            os.replace(tmp_filename, output_filename)
+            with open(key_file, 'w', encoding='utf-8') as f:
+                f.write(input_key)
             print(f"✅ PDF report generated successfully: {output_filename}")
             return True
         except Exception as e:
             print(f"❌ Error generating PDF: {e}")
+            # Don't leave a partial render behind; the previous report (if any) stays in place
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
             return False
 
 def main():
@@ -798,9 +1088,11 @@ def main():
     # Default JSON file
     json_file = "CALL_1117711_speaker_segmented_ANALYSIS.json"
     
-    # Allow command line argument
-    if len(sys.argv) > 1:
-        json_file = sys.argv[1]
+    # Allow command line argument; --force rebuilds even if the report is up to date
+    force = '--force' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--force']
+    if args:
+        json_file = args[0]
     
     if not os.path.exists(json_file):
         print(f"❌ Error: JSON file '{json_file}' not found!")
@@ -815,7 +1107,7 @@ def main():
     pdf_generator = CustomerAnalysisPDFGenerator(json_file)
     
     # Generate the PDF
-    success = pdf_generator.generate_pdf()
+    success = pdf_generator.generate_pdf(force=force)
     
     if success:
         print("\n🎉 PDF Report Generation Complete!")
@@ -1,16 +1,22 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
 import json
-from datetime import timedelta
-from typing import Dict
+import asyncio
+import hashlib
+import httpx
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Check if API key is loaded
 if not os.getenv("OPENAI_API_KEY"):
     print("❌ Error: OPENAI_API_KEY not found in environment variables!")
@@ -18,11 +24,79 @@ if not os.getenv("OPENAI_API_KEY"):
     print("OPENAI_API_KEY=your_api_key_here")
     exit(1)
 
-# Token usage tracking
-total_input_tokens = 0
-total_output_tokens = 0
+# Maximum number of in-flight block requests (keeps us under RPM limits)
+MAX_CONCURRENT_REQUESTS = 10
+
+# Number of transcript blocks labeled per API request
+BLOCKS_PER_REQUEST = 4
+
+# Seconds allowed for generating one labeled block (~15 lines of JSON output). The read timeout
+# scales with the blocks per request, so a slow but healthy response isn't cut off and retried
+READ_TIMEOUT_PER_BLOCK = 45.0
+
+# One file per labeled request, so re-runs only pay for requests that previously failed
+SEG_CACHE_DIR = ".seg_cache"
+
+def create_client():
+    """
+    Create the async OpenAI client for one labeling run
+    Returns:
+        AsyncOpenAI: Client to use with "async with", so its connections are closed with the run's event loop
+    """
+    # The SDK retries connection errors, 429s and 5xx responses with exponential backoff,
+    # so a transient failure no longer turns a whole request into [ERROR] blocks
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=5,
+        timeout=httpx.Timeout(READ_TIMEOUT_PER_BLOCK * BLOCKS_PER_REQUEST, connect=5.0)
+    )
+
+def write_json(path, data):
+    """
+    Write data as indented UTF-8 JSON, using orjson when it is installed
+    Note: the orjson output is equivalent JSON but not byte-identical to json.dump
+    (e.g. small floats are written as 2e-6 instead of 2e-06)
+    """
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+# GPT-4o-mini pricing, per token ($0.15 / $0.60 per 1M input / output tokens)
+_USD_PER_INPUT_TOKEN = 0.15 / 1_000_000
+_USD_PER_OUTPUT_TOKEN = 0.60 / 1_000_000
+
+class CostBreakdown(NamedTuple):
+    """Token usage and unrounded cost in USD and INR; values are rounded only by to_dict()"""
+    usd_to_inr_rate: float
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    input_cost_usd: float
+    output_cost_usd: float
+    input_cost_inr: float
+    output_cost_inr: float
+    total_cost_usd: float
+    total_cost_inr: float
+    
+    def to_dict(self):
+        """Rounded cost breakdown as written to the cost JSON file."""
+        return {
+            "usd_to_inr_rate": self.usd_to_inr_rate,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "input_cost_usd": round(self.input_cost_usd, 6),
+            "output_cost_usd": round(self.output_cost_usd, 6),
+            "input_cost_inr": round(self.input_cost_inr, 4),
+            "output_cost_inr": round(self.output_cost_inr, 4),
+            "total_cost_usd": round(self.total_cost_usd, 6),
+            "total_cost_inr": round(self.total_cost_inr, 4)
+        }
 
-def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float = 85.0) -> Dict[str, float]:
+def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float = 85.0) -> CostBreakdown:
     """
     Calculate the cost based on token usage for GPT-4o-mini
     Args:
@@ -30,110 +104,195 @@ def calculate_cost(input_tokens: int, output_tokens: int, usd_to_inr_rate: float
         output_tokens: Number of output tokens
         usd_to_inr_rate: USD to INR conversion rate
     Returns:
-        dict: Cost breakdown in USD and INR
+        CostBreakdown: Cost breakdown in USD and INR
     """
-    # GPT-4o-mini pricing per 1M tokens
-    input_cost_per_1m = 0.15  # $0.15 per 1M input tokens
-    output_cost_per_1m = 0.60  # $0.60 per 1M output tokens
-    
-    input_cost_usd = (input_tokens / 1_000_000) * input_cost_per_1m
-    output_cost_usd = (output_tokens / 1_000_000) * output_cost_per_1m
+    input_cost_usd = input_tokens * _USD_PER_INPUT_TOKEN
+    output_cost_usd = output_tokens * _USD_PER_OUTPUT_TOKEN
     total_cost_usd = input_cost_usd + output_cost_usd
     
-    input_cost_inr = input_cost_usd * usd_to_inr_rate
-    output_cost_inr = output_cost_usd * usd_to_inr_rate
-    total_cost_inr = total_cost_usd * usd_to_inr_rate
-    
-    return {
-        "usd_to_inr_rate": usd_to_inr_rate,
-        "input_tokens": input_tokens,
-        "output_tokens": output_tokens,
-        "total_tokens": input_tokens + output_tokens,
-        "input_cost_usd": round(input_cost_usd, 6),
-        "output_cost_usd": round(output_cost_usd, 6),
-        "input_cost_inr": round(input_cost_inr, 4),
-        "output_cost_inr": round(output_cost_inr, 4),
-        "total_cost_usd": round(total_cost_usd, 6),
-        "total_cost_inr": round(total_cost_inr, 4)
-    }
+    return CostBreakdown(
+        usd_to_inr_rate, input_tokens, output_tokens, input_tokens + output_tokens,
+        input_cost_usd, output_cost_usd,
+        input_cost_usd * usd_to_inr_rate, output_cost_usd * usd_to_inr_rate,
+        total_cost_usd, total_cost_usd * usd_to_inr_rate
+    )
 
 def seconds_to_hms(seconds_float):
-    return str(timedelta(seconds=int(seconds_float))).zfill(8)
+    minutes, seconds = divmod(int(seconds_float), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 def parse_segments(filepath):
-    segments = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                parts = line.strip().split("] ", 1)
-                if len(parts) == 2:
-                    timestamp = parts[0].replace("[", "").replace("]", "")
-                    start_sec = float(timestamp.split("-->")[0].strip())
-                    text = parts[1]
-                    segments.append((start_sec, text))
-    return segments
-
-def format_prompt(block):
-    joined = "\n".join([f"[{seconds_to_hms(start)}] {text}" for start, text in block])
-    return f"""
-Below is a transcript of a conversation between a sales agent and a customer. Assign each line to either [Sales Agent] or [Customer] based on the text content and provide it back in the format:
+    """Parse "[start --> end] text" lines into parallel lists of start seconds and texts."""
+    starts, texts = [], []
+    # mmap can't map an empty file
+    if os.path.getsize(filepath) == 0:
+        return starts, texts
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for raw in iter(mm.readline, b""):
+            raw = raw.strip()
+            if not raw:
+                continue
+            # One partition for the text and one for the start time, instead of split/replace chains
+            head, sep, text = raw.decode("utf-8").partition("] ")
+            if not sep:
+                continue
+            start, _, _ = head.lstrip("[").partition("-->")
+            starts.append(float(start))
+            texts.append(text)
+    return starts, texts
+
+# Static prompt text, built once at import
+_SYSTEM_MESSAGE = {"role": "system", "content": "You are a transcription analyst."}
+_PROMPT_HEAD = """
+Below is a transcript of a conversation between a sales agent and a customer, split into numbered blocks. Assign each line to either [Sales Agent] or [Customer] based on the text content and provide it back in the format:
 
 [Speaker][hh:mm:ss] Sentence
 
+Respond with ONLY a JSON object containing every block, keeping the block numbers and the line order:
+
+{"blocks": [{"id": 1, "lines": ["[Speaker][hh:mm:ss] Sentence"]}]}
+
 Transcript:
-{joined}
 """
 
-def call_gpt4o(prompt):
-    global total_input_tokens, total_output_tokens
+def format_prompt(blocks):
+    joined = "\n".join([
+        f"===BLOCK {n}/{len(blocks)}===\n" + "\n".join(block)
+        for n, block in enumerate(blocks, start=1)
+    ])
+    return _PROMPT_HEAD + joined + "\n"
+
+def parse_labeled_blocks(content):
+    """Map each block number in a JSON response to its labeled lines."""
+    labeled = {}
+    for item in json.loads(content)['blocks']:
+        lines = item['lines']
+        # A string or a list of objects would otherwise be written out (or crash the join) as if labeled
+        if not (isinstance(lines, list) and all(isinstance(line, str) for line in lines)):
+            raise ValueError(f"lines of block {item['id']} are not a list of strings")
+        labeled[int(item['id'])] = lines
+    return labeled
+
+def cache_path(request):
+    """Path of the on-disk cache entry for a completions request."""
+    key = hashlib.blake2b(json.dumps(request, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(SEG_CACHE_DIR, f"{key}.json")
+
+async def call_gpt4o(client, prompt, semaphore):
+    """
+    Label one request's worth of transcript blocks, serving repeat requests from the on-disk cache
+    Returns:
+        tuple: (response text, input tokens, output tokens, whether it was served from cache)
+    """
+    request = {
+        "model": "gpt-4o-mini",
+        "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"}
+    }
+    path = cache_path(request)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry["content"], entry["input_tokens"], entry["output_tokens"], True
     
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "system", "content": "You are a transcription analyst."},
-                  {"role": "user", "content": prompt}],
-        temperature=0.2
-    )
+    async with semaphore:
+        response = await client.chat.completions.create(**request)
     
-    # Track token usage
+    # Token usage is returned rather than accumulated in globals, which concurrent calls would race on
+    input_tokens = output_tokens = 0
     if hasattr(response, 'usage') and response.usage:
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
-        total_input_tokens += input_tokens
-        total_output_tokens += output_tokens
-        print(f"  Block tokens - Input: {input_tokens:,}, Output: {output_tokens:,}")
+    content = response.choices[0].message.content
+    
+    # Only cache responses we can use, so a malformed one is retried on the next run.
+    # Keep the original usage alongside the content so cached runs report the same cost
+    try:
+        parse_labeled_blocks(content)
+    except (ValueError, KeyError, TypeError):
+        return content, input_tokens, output_tokens, False
+    os.makedirs(SEG_CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"content": content, "input_tokens": input_tokens, "output_tokens": output_tokens}, f)
+    os.replace(path + ".tmp", path)
     
-    return response.choices[0].message.content
+    return content, input_tokens, output_tokens, False
+
+async def label_blocks(requests):
+    """Send all requests concurrently; results (or exceptions) come back in request order."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # Pooled connections belong to the event loop that opened them, so each run gets its own client
+    async with create_client() as client:
+        return await asyncio.gather(
+            *[call_gpt4o(client, format_prompt(request_blocks), semaphore) for request_blocks in requests],
+            return_exceptions=True
+        )
+
+def run_coroutine(coro):
+    """Run a coroutine to completion, on a worker thread if this thread already runs an event loop (e.g. Jupyter)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # asyncio.run refuses to nest inside a running loop, so give it a thread of its own
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 def segment_and_label(input_txt, output_txt, block_size=15):
-    global total_input_tokens, total_output_tokens
-    
-    # Reset token counters
+    starts, texts = parse_segments(input_txt)
+    # Each "[hh:mm:ss] text" line is rendered once here; blocks are just slices of these lines
+    lines = [f"[{seconds_to_hms(start)}] {text}" for start, text in zip(starts, texts)]
+    blocks = [lines[i:i + block_size] for i in range(0, len(lines), block_size)]
+    total_blocks = len(blocks)
+    successful_blocks = 0
     total_input_tokens = 0
     total_output_tokens = 0
     
-    segments = parse_segments(input_txt)
-    total_blocks = (len(segments) + block_size - 1) // block_size
-    successful_blocks = 0
-    
     print(f"🚀 Starting Speaker Segmentation Process...")
-    print(f"📊 Processing {len(segments)} segments in {total_blocks} blocks...")
+    print(f"📊 Processing {len(lines)} segments in {total_blocks} blocks...")
     print("="*60)
     
-    with open(output_txt, "w", encoding="utf-8") as out:
-        for i in range(0, len(segments), block_size):
-            block_num = (i // block_size) + 1
-            block = segments[i:i + block_size]
-            prompt = format_prompt(block)
+    # Several blocks share one request so the instructions are sent once per request
+    requests = [blocks[i:i + BLOCKS_PER_REQUEST] for i in range(0, total_blocks, BLOCKS_PER_REQUEST)]
+    results = run_coroutine(label_blocks(requests))
+    
+    # Collect the blocks in their original order and write them out in one go
+    block_num = 0
+    parts = []
+    for request_blocks, result in zip(requests, results):
+        label = f"blocks {block_num + 1}-{block_num + len(request_blocks)}"
+        labeled = {}
+        if isinstance(result, Exception):
+            print(f"❌ Error in {label}: {result}")
+        else:
+            content, input_tokens, output_tokens, cached = result
+            # Cached responses report the usage of the original call
+            total_input_tokens += input_tokens
+            total_output_tokens += output_tokens
+            print(f"  Tokens for {label} - Input: {input_tokens:,}, Output: {output_tokens:,}{' (cached)' if cached else ''}")
             try:
-                print(f"🔄 Processing block {block_num}/{total_blocks}...")
-                result = call_gpt4o(prompt)
-                out.write(result.strip() + "\n\n")
+                labeled = parse_labeled_blocks(content)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"❌ Error parsing {label}: {e}")
+        
+        for n, block in enumerate(request_blocks, start=1):
+            block_num += 1
+            labeled_lines = labeled.get(n)
+            if labeled_lines:
+                parts.append("\n".join(labeled_lines).strip() + "\n\n")
                 successful_blocks += 1
-            except Exception as e:
-                print(f"❌ Error in block {block_num}: {e}")
-                # Write the original block with error marker
-                error_block = "\n".join([f"[ERROR][{seconds_to_hms(start)}] {text}" for start, text in block])
-                out.write(error_block + "\n\n")
+                continue
+            
+            if labeled:
+                print(f"❌ Error in block {block_num}: missing from response")
+            # Keep the original block with error marker
+            error_block = "\n".join([f"[ERROR]{line}" for line in block])
+            parts.append(error_block + "\n\n")
+    
+    with open(output_txt, "w", encoding="utf-8") as out:
+        out.write("".join(parts))
     
     print("\n" + "="*60)
     print("📊 SEGMENTATION ANALYSIS COMPLETE")
@@ -145,33 +304,32 @@ def segment_and_label(input_txt, output_txt, block_size=15):
     
     print(f"\n💰 TOKEN USAGE & COST ANALYSIS")
     print("-"*40)
-    print(f"📥 Total Input Tokens:  {cost_analysis['input_tokens']:,}")
-    print(f"📤 Total Output Tokens: {cost_analysis['output_tokens']:,}")
-    print(f"🔢 Total Tokens:        {cost_analysis['total_tokens']:,}")
+    print(f"📥 Total Input Tokens:  {cost_analysis.input_tokens:,}")
+    print(f"📤 Total Output Tokens: {cost_analysis.output_tokens:,}")
+    print(f"🔢 Total Tokens:        {cost_analysis.total_tokens:,}")
     
     print(f"\n💵 COST BREAKDOWN (USD)")
     print("-"*40)
-    print(f"Input Cost:  ${cost_analysis['input_cost_usd']:.6f}")
-    print(f"Output Cost: ${cost_analysis['output_cost_usd']:.6f}")
-    print(f"Total Cost:  ${cost_analysis['total_cost_usd']:.6f}")
+    print(f"Input Cost:  ${cost_analysis.input_cost_usd:.6f}")
+    print(f"Output Cost: ${cost_analysis.output_cost_usd:.6f}")
+    print(f"Total Cost:  ${cost_analysis.total_cost_usd:.6f}")
     
-    print(f"\n💸 COST BREAKDOWN (INR @ {cost_analysis['usd_to_inr_rate']})")
+    print(f"\n💸 COST BREAKDOWN (INR @ {cost_analysis.usd_to_inr_rate})")
     print("-"*40)
-    print(f"Input Cost:  ₹{cost_analysis['input_cost_inr']:.4f}")
-    print(f"Output Cost: ₹{cost_analysis['output_cost_inr']:.4f}")
-    print(f"Total Cost:  ₹{cost_analysis['total_cost_inr']:.4f}")
+    print(f"Input Cost:  ₹{cost_analysis.input_cost_inr:.4f}")
+    print(f"Output Cost: ₹{cost_analysis.output_cost_inr:.4f}")
+    print(f"Total Cost:  ₹{cost_analysis.total_cost_inr:.4f}")
     
     # Save cost analysis to JSON file
     cost_file = output_txt.replace('.txt', '_SEGMENTATION_COST.json')
-    with open(cost_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "process": "Speaker Segmentation",
-            "model": "gpt-4o-mini",
-            "blocks_processed": successful_blocks,
-            "total_blocks": total_blocks,
-            "success_rate": f"{(successful_blocks/total_blocks*100):.1f}%",
-            "cost_analysis": cost_analysis
-        }, f, indent=2, ensure_ascii=False)
+    write_json(cost_file, {
+        "process": "Speaker Segmentation",
+        "model": "gpt-4o-mini",
+        "blocks_processed": successful_blocks,
+        "total_blocks": total_blocks,
+        "success_rate": f"{(successful_blocks/total_blocks*100 if total_blocks else 0.0):.1f}%",
+        "cost_analysis": cost_analysis.to_dict()
+    })
     
     print(f"\n💾 Cost analysis saved to: {cost_file}")
     print("="*60)
@@ -0,0 +1,267 @@
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import Intent_2
+
+OVERALL_REPLY = {
+    "overall_intent": "Book a Bali trip",
+    "purchase_likelihood": "High",
+    "sentiment_analysis": {"overall_sentiment": "Positive", "confidence_score": "85", "sentiment_indicators": ["sounds good"]},
+    "key_interests": ["hotels"],
+    "concerns_objections": ["price"],
+    "buying_signals": ["visa"],
+    "decision_stage": "Decision",
+    "commitment_level": "High",
+    "detailed_analysis": "Keen to book."
+}
+
+
+def segment_reply(*ids):
+    """Batched segment response with one positive entry per id."""
+    return json.dumps({"segments": [{"id": i, "s": "P", "e": "H", "k": ["dates"], "b": "Y"} for i in ids]})
+
+
+def completion(body):
+    """Chat completion answering an overall or batched segment analysis request."""
+    if body["messages"][0]["content"] == Intent_2.OVERALL_SYSTEM_MESSAGE:
+        content = json.dumps(OVERALL_REPLY)
+    else:
+        content = segment_reply(*map(int, re.findall(r"### Segment (\d+)", body["messages"][-1]["content"])))
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body["model"],
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Chat completions and Batch API endpoints answering the overall and batched segment analyses."""
+    protocol_version = "HTTP/1.1"
+    calls = 0
+    # custom_ids of every submitted batch request
+    batched = []
+    # Optional hook to replace a batch output line, e.g. with garbage
+    reshape_output = None
+    # Output JSONL of the last submitted batch
+    output = ""
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, payload):
+        self.send_data(json.dumps(payload).encode("utf-8"), "application/json")
+
+    def send_data(self, data, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.endswith("/chat/completions"):
+            FakeOpenAIHandler.calls += 1
+            self.send_json(completion(json.loads(data)))
+        elif self.path.endswith("/files"):
+            # Pull the JSONL lines out of the multipart upload
+            lines = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.startswith('{"custom_id"')]
+            FakeOpenAIHandler.batched.extend(line["custom_id"] for line in lines)
+            output = []
+            for line in lines:
+                result = json.dumps({"custom_id": line["custom_id"], "error": None,
+                                     "response": {"status_code": 200, "body": completion(line["body"])}})
+                if FakeOpenAIHandler.reshape_output:
+                    result = FakeOpenAIHandler.reshape_output(line["custom_id"], result)
+                output.append(result)
+            FakeOpenAIHandler.output = "\n".join(output)
+            self.send_json({"id": "file-in", "object": "file", "bytes": len(data), "created_at": 0,
+                            "filename": "analysis_batch.jsonl", "purpose": "batch", "status": "processed"})
+        elif self.path.endswith("/batches"):
+            self.send_json({"id": "batch-test", "object": "batch", "endpoint": "/v1/chat/completions",
+                            "input_file_id": "file-in", "output_file_id": "file-out", "completion_window": "24h",
+                            "created_at": 0, "status": "completed"})
+
+    def do_GET(self):
+        if self.path.endswith("/files/file-out/content"):
+            self.send_data(FakeOpenAIHandler.output.encode("utf-8"), "application/octet-stream")
+
+
+class MainTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.poll_seconds = Intent_2.BATCH_POLL_SECONDS
+        Intent_2.BATCH_POLL_SECONDS = 0
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = os.environ.get("OPENAI_BASE_URL")
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{cls.server.server_port}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        Intent_2.BATCH_POLL_SECONDS = cls.poll_seconds
+        cls.server.shutdown()
+        cls.server.server_close()
+        if cls.base_url is None:
+            os.environ.pop("OPENAI_BASE_URL", None)
+        else:
+            os.environ["OPENAI_BASE_URL"] = cls.base_url
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.transcript = os.path.join(self.tmp, "call.txt")
+        with open(self.transcript, "w", encoding="utf-8") as f:
+            # Three 5-minute segments, one request for all of them plus the overall analysis
+            for minute in (0, 6, 11):
+                f.write(f"[Sales Agent][00:{minute:02d}:00] Shall I hold the hotel for you?\n")
+                f.write(f"[Customer][00:{minute:02d}:20] Sounds good, please confirm the booking for those dates\n")
+        FakeOpenAIHandler.calls = 0
+        FakeOpenAIHandler.batched = []
+        FakeOpenAIHandler.reshape_output = None
+
+    def run_main(self, cache, batch=False):
+        """Analyze the transcript with the given on-disk cache and return the written analysis."""
+        cache_dir = Intent_2.LLM_CACHE_DIR
+        Intent_2.LLM_CACHE_DIR = os.path.join(self.tmp, cache)
+        try:
+            Intent_2.main(self.transcript, batch)
+        finally:
+            Intent_2.LLM_CACHE_DIR = cache_dir
+        with open(os.path.join(self.tmp, "call_ANALYSIS.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_main_twice_reports_each_run_alone(self):
+        for run in range(2):
+            tokens = self.run_main(f"cache{run}")["token_usage"]
+            self.assertEqual(tokens["api_calls_made"], 2)
+            self.assertEqual(tokens["total_input_tokens"], 200)
+        self.assertEqual(FakeOpenAIHandler.calls, 4)
+
+    def test_cached_rerun_is_not_billed(self):
+        self.run_main("cache")
+        analysis = self.run_main("cache")
+        tokens = analysis["token_usage"]
+        self.assertEqual(FakeOpenAIHandler.calls, 2)
+        self.assertEqual(tokens["api_calls_made"], 0)
+        self.assertEqual(tokens["total_tokens"], 0)
+        self.assertEqual(tokens["cached_calls"], 2)
+        self.assertEqual(tokens["cached_tokens"], 300)
+        self.assertEqual(analysis["cost_breakdown"]["total_cost_usd"], 0)
+
+    def test_batch_rerun_is_served_from_cache(self):
+        tokens = self.run_main("cache", batch=True)["token_usage"]
+        self.assertEqual(FakeOpenAIHandler.batched, ["overall", "segments-0"])
+        self.assertEqual(tokens["api_calls_made"], 2)
+
+        # Cached by the batch run, so neither a new batch nor a direct call goes out
+        for batch in (True, False):
+            analysis = self.run_main("cache", batch)
+            self.assertEqual(FakeOpenAIHandler.batched, ["overall", "segments-0"])
+            self.assertEqual(FakeOpenAIHandler.calls, 0)
+            self.assertEqual(analysis["token_usage"]["cached_calls"], 2)
+            self.assertEqual(len(analysis["conversation_flow"]), 3)
+
+    def test_batch_bad_output_line_loses_only_its_request(self):
+        bad_lines = {
+            "malformed": "{not json",
+            "errored": json.dumps({"custom_id": "segments-0", "response": None, "error": {"code": "server_error"}})
+        }
+        for name, bad_line in bad_lines.items():
+            with self.subTest(name):
+                FakeOpenAIHandler.batched = []
+                FakeOpenAIHandler.reshape_output = lambda custom_id, line: bad_line if custom_id == "segments-0" else line
+                cache = f"cache-{name}"
+                analysis = self.run_main(cache, batch=True)
+                self.assertEqual(analysis["overall_analysis"], OVERALL_REPLY)
+                self.assertEqual(analysis["conversation_flow"], [])
+
+                # Only the failed request is submitted again
+                FakeOpenAIHandler.reshape_output = None
+                analysis = self.run_main(cache, batch=True)
+                self.assertEqual(FakeOpenAIHandler.batched, ["overall", "segments-0", "segments-0"])
+                self.assertEqual(len(analysis["conversation_flow"]), 3)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.2}
+    usage = {"prompt_tokens": 10, "completion_tokens": 5}
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        cache_dir = Intent_2.LLM_CACHE_DIR
+        Intent_2.LLM_CACHE_DIR = os.path.join(tmp, "cache")
+        self.addCleanup(setattr, Intent_2, "LLM_CACHE_DIR", cache_dir)
+
+    def test_concurrent_writers(self):
+        threads = [
+            threading.Thread(target=Intent_2.write_cache, args=(self.request, json.dumps({"n": n}), self.usage, "stop"))
+            for n in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        content, usage = Intent_2.read_cache(self.request)
+        self.assertIn(json.loads(content)["n"], range(8))
+        self.assertEqual(usage, self.usage)
+        self.assertEqual(os.listdir(Intent_2.LLM_CACHE_DIR), [os.path.basename(Intent_2.cache_path(self.request))])
+
+    def test_incomplete_replies_are_not_cached(self):
+        Intent_2.write_cache(self.request, '{"cut": ', self.usage, "length")
+        Intent_2.write_cache(self.request, '{"n": 1}', self.usage, "length")
+        Intent_2.write_cache(self.request, 'not json', self.usage, "stop")
+        self.assertIsNone(Intent_2.read_cache(self.request))
+
+
+class ParseSegmentBatchTest(unittest.TestCase):
+    batch = [(0, []), (1, []), (2, [])]
+
+    def segments(self, content, batch=None):
+        return [seg['segment'] for seg in Intent_2.parse_segment_batch(batch or self.batch, content)]
+
+    def test_numeric_ids(self):
+        self.assertEqual(self.segments(segment_reply(1, 2, 3)), [1, 2, 3])
+
+    def test_ids_copied_from_the_heading(self):
+        self.assertEqual(self.segments(segment_reply("Segment 1", "Segment 2", "3")), [1, 2, 3])
+
+    def test_bad_id_falls_back_to_response_order(self):
+        self.assertEqual(self.segments(segment_reply(1, "second", 3)), [1, 2, 3])
+
+    def test_bad_id_is_skipped_when_counts_differ(self):
+        self.assertEqual(self.segments(segment_reply(1, "second")), [1])
+
+
+class IsTrivialSegmentTest(unittest.TestCase):
+    def is_trivial(self, *texts):
+        return Intent_2.is_trivial_segment([{"text": text} for text in texts])
+
+    def test_rubric_keyword_is_not_trivial(self):
+        self.assertFalse(self.is_trivial("We would like to travel on these dates next month"))
+        self.assertFalse(self.is_trivial("Okay, let's do it, please send the details over"))
+
+    def test_keywords_match_whole_words_only(self):
+        self.assertTrue(self.is_trivial("Can you send me an update about everything tomorrow"))
+
+    def test_short_segment_is_trivial(self):
+        self.assertTrue(self.is_trivial("Visa?"))
+
+
+if __name__ == "__main__":
+    unittest.main()
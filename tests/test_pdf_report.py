@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.platypus import Paragraph
+
+import pdf_report_generator_new
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SECTION_HEADINGS = [
+    "📊 EXECUTIVE SUMMARY",
+    "💰 GPT-4o MINI COST ANALYSIS",
+    "🔍 KEY INSIGHTS",
+    "📊 ANALYTICS DASHBOARD",
+    "📈 CONVERSATION FLOW ANALYSIS",
+    "🎯 SALES RECOMMENDATIONS"
+]
+
+
+def page_count(pdf_path):
+    """Number of page objects in a ReportLab PDF."""
+    with open(pdf_path, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b", f.read()))
+
+
+class GeneratePdfTest(unittest.TestCase):
+    def setUp(self):
+        # The analysis and its segmentation cost file sit side by side, as the pipeline writes them
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        for name in os.listdir(FIXTURES_DIR):
+            shutil.copy(os.path.join(FIXTURES_DIR, name), self.tmp)
+        self.json_file = os.path.join(self.tmp, "call_ANALYSIS.json")
+        self.pdf_file = os.path.join(self.tmp, "call_ANALYSIS_PROFESSIONAL_REPORT.pdf")
+
+    def generator(self):
+        return pdf_report_generator_new.CustomerAnalysisPDFGenerator(self.json_file)
+
+    def test_report_sections_and_pages(self):
+        generator = self.generator()
+        headings = [
+            flowable.getPlainText() for flowable in generator.build_story()
+            if isinstance(flowable, Paragraph) and flowable.style.name == "CustomSectionHeader"
+        ]
+        self.assertEqual(headings, SECTION_HEADINGS)
+
+        self.assertTrue(generator.generate_pdf())
+        self.assertEqual(page_count(self.pdf_file), 8)
+        self.assertEqual(os.listdir(self.tmp).count("call_ANALYSIS_PROFESSIONAL_REPORT.pdf.tmp"), 0)
+
+    def test_unchanged_inputs_are_skipped(self):
+        self.assertTrue(self.generator().generate_pdf())
+        built = os.stat(self.pdf_file)
+
+        # Each build moves a new file into place, so the inode tells a rebuild from a skip
+        self.assertTrue(self.generator().generate_pdf())
+        self.assertEqual(os.stat(self.pdf_file).st_ino, built.st_ino)
+
+        self.assertTrue(self.generator().generate_pdf(force=True))
+        self.assertNotEqual(os.stat(self.pdf_file).st_ino, built.st_ino)
+
+    def test_changed_inputs_are_rebuilt(self):
+        self.assertTrue(self.generator().generate_pdf())
+        built = os.stat(self.pdf_file)
+
+        with open(os.path.join(self.tmp, "call_SEGMENTATION_COST.json"), "r+", encoding="utf-8") as f:
+            cost = json.load(f)
+            cost["cost_analysis"]["total_cost_usd"] *= 2
+            f.seek(0)
+            json.dump(cost, f)
+            f.truncate()
+
+        self.assertTrue(self.generator().generate_pdf())
+        self.assertNotEqual(os.stat(self.pdf_file).st_ino, built.st_ino)
+
+    def test_long_cover_flows_onto_the_next_page(self):
+        with open(self.json_file, "r+", encoding="utf-8") as f:
+            data = json.load(f)
+            data["overall_analysis"]["overall_intent"] = " ".join(["Book a Bali trip."] * 600)
+            f.seek(0)
+            json.dump(data, f)
+            f.truncate()
+
+        self.assertTrue(self.generator().generate_pdf())
+        self.assertGreater(page_count(self.pdf_file), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint that labels every transcript line as the customer."""
+    protocol_version = "HTTP/1.1"
+    calls = 0
+    # Optional hook to reshape each block's labeled lines, e.g. into an invalid type
+    reshape_lines = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAIHandler.calls += 1
+
+        prompt = body["messages"][-1]["content"]
+        parts = re.split(r"===BLOCK (\d+)/\d+===\n", prompt)
+        blocks = [
+            {"id": int(parts[i]), "lines": [f"[Customer]{line}" for line in parts[i + 1].splitlines() if line.startswith("[")]}
+            for i in range(1, len(parts), 2)
+        ]
+        if FakeOpenAIHandler.reshape_lines:
+            for block in blocks:
+                block["lines"] = FakeOpenAIHandler.reshape_lines(block["lines"])
+        data = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps({"blocks": blocks})}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SegmentAndLabelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        os.environ["OPENAI_API_KEY"] = "test-key"
+
+        global segmentation
+        import segmentation
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.input_txt = os.path.join(self.tmp, "segments.txt")
+        with open(self.input_txt, "w", encoding="utf-8") as f:
+            for i in range(40):
+                f.write(f"[{i * 10:.2f} --> {i * 10 + 5:.2f}] Sentence number {i}\n")
+        FakeOpenAIHandler.calls = 0
+        FakeOpenAIHandler.reshape_lines = None
+
+    def run_segmentation(self, run):
+        """Label the transcript with a fresh on-disk cache, so every run hits the server."""
+        cache_dir = segmentation.SEG_CACHE_DIR
+        segmentation.SEG_CACHE_DIR = os.path.join(self.tmp, f"cache{run}")
+        try:
+            output_txt = os.path.join(self.tmp, f"out{run}.txt")
+            segmentation.segment_and_label(self.input_txt, output_txt)
+        finally:
+            segmentation.SEG_CACHE_DIR = cache_dir
+        with open(output_txt, encoding="utf-8") as f:
+            output = f.read()
+        with open(output_txt.replace(".txt", "_SEGMENTATION_COST.json"), encoding="utf-8") as f:
+            cost = json.load(f)
+        return output, cost
+
+    def assert_all_blocks_labeled(self, output, cost):
+        self.assertNotIn("[ERROR]", output)
+        self.assertEqual(output.count("[Customer]["), 40)
+        self.assertEqual(cost["blocks_processed"], cost["total_blocks"])
+
+    def test_segment_and_label_twice(self):
+        # Each run has its own event loop; the second must not reuse the first one's connections
+        for run in range(2):
+            self.assert_all_blocks_labeled(*self.run_segmentation(run))
+        # 40 segments -> 3 blocks -> 1 request per run, with no retried requests
+        self.assertEqual(FakeOpenAIHandler.calls, 2)
+
+    def test_segment_and_label_twice_inside_running_loop(self):
+        async def main():
+            for run in range(2):
+                self.assert_all_blocks_labeled(*self.run_segmentation(run))
+
+        asyncio.run(main())
+        self.assertEqual(FakeOpenAIHandler.calls, 2)
+
+    def test_malformed_lines_are_not_written_or_cached(self):
+        malformed = {
+            "string": lambda lines: "\n".join(lines),
+            "objects": lambda lines: [{"text": line} for line in lines]
+        }
+        for run, (name, reshape) in enumerate(malformed.items()):
+            with self.subTest(name):
+                FakeOpenAIHandler.reshape_lines = reshape
+                output, cost = self.run_segmentation(run)
+                self.assertEqual(output.count("[ERROR]["), 40)
+                self.assertEqual(cost["blocks_processed"], 0)
+                self.assertFalse(os.path.exists(os.path.join(self.tmp, f"cache{run}")))
+
+    def test_empty_transcript(self):
+        open(self.input_txt, "w").close()
+        output, cost = self.run_segmentation(0)
+        self.assertEqual(output, "")
+        self.assertEqual(cost["total_blocks"], 0)
+        self.assertEqual(cost["success_rate"], "0.0%")
+        self.assertEqual(FakeOpenAIHandler.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()